@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# Замеры производительности get_rss.py
+import argparse
+import email.utils
+import http.server
+import json
+import os
+import random
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+
+import get_rss
+
+ARTICLE_SIZE = 200 * 1024  # Размер тела статьи для замера, байт
+WIDTH = 79                 # Ширина текста, как в терминале на 80 колонок
+REPEAT = 5
+
+# Параметры синтетических лент по умолчанию
+FEED_COUNT = 8
+FEED_ITEMS = 500
+FEED_LATENCY = 0.02        # Задержка ответа локального сервера, секунд
+SCREEN_SIZE = (50, 120)    # Строки и колонки экрана-заглушки
+REGRESSION_THRESHOLD = 0.15  # Насколько медленнее прошлого прогона считается регрессией
+REGRESSION_MIN_MS = 0.5      # Разница меньше этой считается шумом
+
+WORDS = [
+    "новость", "лента", "обновление", "ядро", "Linux", "релиз", "проект",
+    "&amp;", "&nbsp;", "&laquo;цитата&raquo;", "версия", "сборка", "тест",
+]
+
+# Словарь синтетических лент: записи разных лент не должны склеиваться как дубли
+VOCABULARY = [f"слово{i}" for i in range(5000)]
+
+def make_article(size=ARTICLE_SIZE, seed=1):
+    """HTML статьи из абзацев, списков и ссылок заданного размера"""
+    rnd = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size:
+        if rnd.random() < 0.2:
+            items = "".join(
+                f"<li>{' '.join(rnd.choices(WORDS, k=8))}</li>" for _ in range(4)
+            )
+            chunk = f"<ul>{items}</ul>\n"
+        else:
+            text = " ".join(rnd.choices(WORDS, k=60))
+            chunk = f'<p>{text} <a href="https://example.org/{total}">ссылка</a></p>\n'
+        parts.append(chunk)
+        total += len(chunk.encode("utf-8"))
+    return {"id": f"bench-{seed}", "title": "Замер", "description": "".join(parts)}
+
+def make_feed(items=FEED_ITEMS, fmt="rss", seed=1):
+    """XML ленты от новых записей к старым: первая половина сегодняшняя, остальные раз в час
+    до начала дня, чтобы число сегодняшних записей не зависело от времени запуска"""
+    rnd = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    today_start = get_rss.today_start_utc()
+    today_items = items // 2
+    step = (now - today_start) / (today_items + 1)
+    entries = []
+    for i in range(items):
+        if i < today_items:
+            published = now - step * i
+        else:
+            published = today_start - timedelta(hours=i - today_items + 1)
+        title = escape(" ".join(rnd.choices(VOCABULARY, k=6)))
+        body = escape(f"<p>{' '.join(rnd.choices(VOCABULARY, k=80))}</p>")
+        link = f"https://example.org/{seed}/{i}"
+        if fmt == "atom":
+            entries.append(
+                f"<entry><title>{title}</title><id>urn:bench:{seed}:{i}</id>"
+                f'<link rel="alternate" href="{link}"/>'
+                f"<published>{published.isoformat()}</published>"
+                f"<summary>{body}</summary></entry>")
+        else:
+            entries.append(
+                f"<item><title>{title}</title><link>{link}</link>"
+                f"<guid>{link}</guid>"
+                f"<pubDate>{email.utils.format_datetime(published)}</pubDate>"
+                f"<description>{body}</description></item>")
+    if fmt == "atom":
+        return ('<?xml version="1.0" encoding="utf-8"?>'
+                '<feed xmlns="http://www.w3.org/2005/Atom"><title>Замер</title>'
+                + "".join(entries) + "</feed>").encode("utf-8")
+    return ('<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+            "<title>Замер</title>" + "".join(entries) + "</channel></rss>").encode("utf-8")
+
+# Локальный сервер лент с задержкой ответа и ETag
+class FeedServer:
+    def __init__(self, feeds, latency=FEED_LATENCY):
+        """feeds - путь -> байты ленты"""
+        self.feeds = feeds
+        self.latency = latency
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                time.sleep(server.latency)
+                body = server.feeds.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = f'"{len(body)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/xml")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Потоковый разбор закрывает соединение, дочитав сегодняшние записи
+                    pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Пул клиента закрывает простаивающие keep-alive соединения, это не ошибка
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.httpd.server_port}{path}"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# Заглушка окна curses: принимает вывод и ничего не рисует
+class HeadlessScreen:
+    def __init__(self, rows, cols):
+        self.size = (rows, cols)
+        self.calls = 0
+
+    def getmaxyx(self):
+        return self.size
+
+    def _draw(self, *args):
+        self.calls += 1
+
+    erase = clear = move = clrtoeol = addstr = noutrefresh = refresh = _draw
+
+# Прежняя реализация из show_article, для сравнения
+def legacy_article_lines(article, width):
+    description = article.get('description') or 'Нет описания'
+
+    clean_description = ""
+    inside_tag = False
+    for char in description:
+        if char == '<':
+            inside_tag = True
+        elif char == '>':
+            inside_tag = False
+        elif not inside_tag:
+            clean_description += char
+
+    wrapped_lines = []
+    for paragraph in clean_description.split('\n'):
+        if paragraph.strip():
+            wrapped = textwrap.wrap(paragraph, width=width)
+            wrapped_lines.extend(wrapped)
+            wrapped_lines.append("")
+    return wrapped_lines
+
+def measure(func, repeat=REPEAT, setup=None, number=1):
+    """Лучшее из repeat запусков время одного вызова, миллисекунды.
+    setup выполняется вне замера; быстрые функции вызываются number раз подряд"""
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - started) * 1000 / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def reset_state(workdir):
+    """Чистое состояние get_rss: кэши в памяти и снимок лент во временном каталоге"""
+    get_rss.feed_snapshot = get_rss.FeedSnapshot(
+        os.path.join(workdir, f"snapshot-{time.perf_counter_ns()}.db"),
+        os.path.join(workdir, "feed_cache"))
+    get_rss.feed_store = get_rss.FeedStore()
+    get_rss.duplicate_index = get_rss.DuplicateIndex()
+    get_rss.unread_counters.clear()
+
+def bench_pipeline(args, workdir):
+    """Загрузка и разбор через count_unread_news, фильтр записей и отрисовка списка"""
+    feeds_xml = {f"/feed/{i}": make_feed(args.items, args.format, seed=i)
+                 for i in range(args.feeds)}
+    server = FeedServer(feeds_xml, args.latency)
+    feeds = [{"name": f"Лента {i}", "link": server.url(path)}
+             for i, path in enumerate(feeds_xml)]
+    read_news = get_rss.ReadNewsJournal(
+        os.path.join(workdir, "read_news"),
+        legacy_paths=(os.path.join(workdir, "read_news.log"), os.path.join(workdir, "read_news.json")))
+    fetcher = get_rss.FeedFetcher()
+    results = []
+    try:
+        def count_all():
+            futures = get_rss.fetch_unread_counts(fetcher, feeds, read_news,
+                                                  lambda feed, count: None, refresh=True)
+            for future in futures:
+                future.result()
+
+        def cold():
+            reset_state(workdir)
+
+        # Первый запрос: полная загрузка и разбор каждой ленты
+        results.append(("count_unread_news, все ленты без кэша",
+                        measure(count_all, args.repeat, setup=cold)))
+        # Повторный опрос: сервер отвечает 304, записи берутся из снимка
+        results.append(("count_unread_news, все ленты, ответ 304", measure(count_all, args.repeat)))
+        # Снимок без сети, как при холодном старте
+        results.append(("preload_unread_counts из снимка", measure(
+            lambda: get_rss.preload_unread_counts(feeds, read_news), args.repeat,
+            setup=lambda: setattr(get_rss, "feed_store", get_rss.FeedStore()))))
+        
+        # Все записи ленты, без остановки на вчерашних
+        parser = get_rss.FeedStreamParser(feeds[0]["link"], datetime.min.replace(tzinfo=timezone.utc))
+        parser.feed(feeds_xml["/feed/0"])
+        parser.close()
+        entries = parser.entries
+        today_start = get_rss.today_start_utc()
+        results.append((f"filter_today_entries, {len(entries)} записей", measure(
+            lambda: get_rss.filter_today_entries(entries, today_start), args.repeat, number=20)))
+        
+        items = [dict(item, is_read=False, feed=feeds[0]["link"])
+                 for item in get_rss.feed_store.get(feeds[0]["link"])]
+        results.extend(bench_list_view(items, args.repeat))
+    finally:
+        fetcher.shutdown()
+        read_news.close()
+        server.close()
+    return results
+
+def bench_list_view(items, repeat):
+    """NewsListView на экране-заглушке: первая отрисовка и шаг курсора"""
+    rows, cols = SCREEN_SIZE
+    screen = HeadlessScreen(rows, cols)
+    doupdate = get_rss.curses.doupdate
+    get_rss.curses.doupdate = lambda: None
+    try:
+        def full_draw():
+            get_rss.NewsListView(items, "Замер").draw(screen)
+
+        view = get_rss.NewsListView(items, "Замер")
+        view.draw(screen)
+
+        def step():
+            # Вниз и обратно, чтобы замер не упирался в конец списка
+            view.move_down()
+            view.draw(screen)
+            view.move_up()
+            view.draw(screen)
+
+        return [
+            (f"NewsListView, первая отрисовка из {len(items)} записей",
+             measure(full_draw, repeat, number=100)),
+            ("NewsListView, шаг курсора (2 отрисовки)", measure(step, repeat, number=100)),
+        ]
+    finally:
+        get_rss.curses.doupdate = doupdate
+
+def bench_article_text(repeat):
+    article = make_article()
+    size_kb = len(article['description'].encode("utf-8")) // 1024
+
+    def first_open():
+        # Каждый запуск с пустым кэшем, как при первом открытии статьи
+        get_rss.ArticleTextCache().lines(article, WIDTH)
+
+    cache = get_rss.ArticleTextCache()
+    cache.lines(article, WIDTH)
+
+    return [
+        (f"статья {size_kb} КБ: старый цикл по символам",
+         measure(lambda: legacy_article_lines(article, WIDTH), repeat)),
+        (f"статья {size_kb} КБ: HTMLTextExtractor + перенос", measure(first_open, repeat)),
+        (f"статья {size_kb} КБ: повторное открытие (кэш)",
+         measure(lambda: cache.lines(article, WIDTH), repeat, number=1000)),
+    ]
+
+def compare(results, baseline_path):
+    """Печатает разницу с сохраненным прогоном; True, если есть регрессии"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["params"] != results["params"]:
+        print(f"Внимание: параметры отличаются от {baseline_path}: {baseline['params']}")
+    
+    regressions = False
+    print(f"Сравнение с {baseline_path}:")
+    for name, ms in results["timings"].items():
+        old = baseline["timings"].get(name)
+        if old is None:
+            print(f"  {name:<52} {ms:10.3f} мс (нет в прошлом прогоне)")
+            continue
+        change = (ms - old) / old if old else 0.0
+        mark = ""
+        if change > REGRESSION_THRESHOLD and ms - old > REGRESSION_MIN_MS:
+            mark = "  РЕГРЕССИЯ"
+            regressions = True
+        print(f"  {name:<52} {old:10.3f} -> {ms:10.3f} мс ({change:+.0%}){mark}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры get_rss.py на синтетических лентах")
+    parser.add_argument("--feeds", type=int, default=FEED_COUNT, help="число лент")
+    parser.add_argument("--items", type=int, default=FEED_ITEMS, help="записей в ленте")
+    parser.add_argument("--format", choices=("rss", "atom"), default="rss")
+    parser.add_argument("--latency", type=float, default=FEED_LATENCY,
+                        help="задержка ответа сервера, секунд")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--save", metavar="FILE", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", metavar="FILE", help="сравнить с сохраненными результатами")
+    args = parser.parse_args()
+    
+    params = {key: getattr(args, key) for key in ("feeds", "items", "format", "latency", "repeat")}
+    print(f"Ленты: {args.feeds} x {args.items} записей ({args.format}), "
+          f"задержка {args.latency * 1000:.0f} мс, лучшее из {args.repeat}")
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        timings = bench_pipeline(args, workdir) + bench_article_text(args.repeat)
+    for name, ms in timings:
+        print(f"  {name:<52} {ms:10.3f} мс")
+    
+    results = {"params": params, "timings": dict(timings)}
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.compare and compare(results, args.compare):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# Замеры запросов work_manager.py на большой базе
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import work_manager
+
+TASKS = 500
+OBJECTS = 100_000
+LOGS_PER_TASK = 200
+REPEAT = 5
+PAGE = 40  # Строк задач на экране
+# Список задач до постраничной загрузки: все строки с описаниями, сортировка без индекса
+LEGACY_TASKS_QUERY = "SELECT id, name, created_date, description FROM tasks ORDER BY datetime(created_date) DESC"
+OBJECT_TYPES = ["Table", "Procedure", "View", "Function", "Trigger", "Package"]
+# Словарь текстов: частоты слов разные, как в живых описаниях и логах
+VOCABULARY = [f"слово{i}" for i in range(5000)]
+
+def measure(func, repeat=REPEAT, number=1):
+    """Лучшее из repeat запусков время одного вызова, миллисекунды"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - started) * 1000 / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def seed(path, tasks, objects, logs_per_task):
+    """База в исходной схеме (только первая миграция), заполненная случайными данными"""
+    rnd = random.Random(1)
+    
+    def text(words):
+        # Первые слова словаря встречаются чаще, остальные - редко
+        return " ".join(VOCABULARY[int(rnd.paretovariate(1.2)) % len(VOCABULARY)] for _ in range(words))
+    
+    conn = sqlite3.connect(path)
+    work_manager.migrate(conn, target=1)
+    start = datetime(2020, 1, 1)
+    task_ids = [f"TASK-{i}" for i in range(tasks)]
+    conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?)",
+                     [(task_id, f"Задача {task_id}",
+                       (start + timedelta(minutes=rnd.randrange(10**6))).strftime("%Y-%m-%d %H:%M:%S"),
+                       text(20))
+                      for task_id in task_ids])
+    conn.executemany("""INSERT INTO task_objects (task_id, object_type, name, description, created_date)
+                     VALUES (?, ?, ?, ?, ?)""",
+                     [(rnd.choice(task_ids), rnd.choice(OBJECT_TYPES), f"OBJ_{i}", text(10),
+                       (start + timedelta(minutes=rnd.randrange(10**6))).strftime("%Y-%m-%d %H:%M:%S"))
+                      for i in range(objects)])
+    conn.executemany("""INSERT INTO task_logs (task_id, log_date, content, created_date)
+                     VALUES (?, ?, ?, ?)""",
+                     [(task_id, (start + timedelta(days=day)).strftime("%Y-%m-%d"), text(30),
+                       (start + timedelta(days=day)).strftime("%Y-%m-%d %H:%M:%S"))
+                      for task_id in task_ids for day in range(logs_per_task)])
+    conn.commit()
+    conn.close()
+
+def bench(conn, queries, repeat):
+    """Время запросов списков и их планы"""
+    results = []
+    for name, query, params in queries:
+        ms = measure(lambda: conn.execute(query, params).fetchall(), repeat)
+        plan = "; ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+        results.append((name, ms, plan))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры запросов work_manager.py")
+    parser.add_argument("--tasks", type=int, default=TASKS)
+    parser.add_argument("--objects", type=int, default=OBJECTS)
+    parser.add_argument("--logs", type=int, default=LOGS_PER_TASK, help="логов на задачу")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args()
+    
+    print(f"Задачи: {args.tasks}, объекты: {args.objects}, логи: {args.tasks * args.logs}, "
+          f"лучшее из {args.repeat}")
+    with tempfile.TemporaryDirectory() as workdir:
+        before_path = os.path.join(workdir, "before.db")
+        after_path = os.path.join(workdir, "after.db")
+        seed(before_path, args.tasks, args.objects, args.logs)
+        shutil.copy(before_path, after_path)
+        
+        conn = sqlite3.connect(before_path)
+        task_id = conn.execute("""SELECT task_id FROM task_objects GROUP BY task_id
+                               ORDER BY COUNT(*) DESC LIMIT 1""").fetchone()[0]
+        middle = conn.execute("SELECT created_date, id FROM tasks ORDER BY created_date LIMIT 1 OFFSET ?",
+                              (args.tasks // 2,)).fetchone()
+        lists = [
+            ("объекты задачи", work_manager.OBJECTS_QUERY, (task_id,)),
+            ("логи задачи", work_manager.LOGS_QUERY, (task_id,)),
+        ]
+        before = bench(conn, [("список задач", LEGACY_TASKS_QUERY, ()),
+                              ("прокрутка задач", LEGACY_TASKS_QUERY, ())] + lists, args.repeat)
+        conn.close()
+        
+        started = time.perf_counter()
+        conn = work_manager.init_db(after_path)
+        migrate_ms = (time.perf_counter() - started) * 1000
+        after = bench(conn, [("список задач", work_manager.TASK_PAGE_FIRST, (PAGE,)),
+                             ("прокрутка задач", work_manager.TASK_PAGE_AFTER, middle + (PAGE,))] + lists,
+                      args.repeat)
+        # Поиска до миграций не было: от редкого имени до префикса, который есть почти везде
+        searches = [(query, measure(lambda: work_manager.search(conn, query), args.repeat))
+                    for query in ("OBJ_4242", "слово300", "слово42", "слово5")]
+        conn.close()
+    
+    print(f"Миграция до версии {len(work_manager.MIGRATIONS)}: {migrate_ms:.0f} мс")
+    for (name, old_ms, old_plan), (_, new_ms, new_plan) in zip(before, after):
+        print(f"  {name:<16} {old_ms:9.3f} мс -> {new_ms:9.3f} мс  (x{old_ms / new_ms:.1f})")
+        print(f"    до:    {old_plan}")
+        print(f"    после: {new_plan}")
+    for query, ms in searches:
+        print(f"  поиск '{query}'{'':<{max(0, 9 - len(query))}} {ms:9.3f} мс")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,44 @@
 import json
 import curses
 import os
+import hashlib
+import sqlite3
 import feedparser
 from datetime import datetime, timezone, timedelta
 import textwrap
+from collections import OrderedDict
+from html.parser import HTMLParser
 import time
 import threading
+import socket
+import queue
+import heapq
+import re
+import calendar
+import statistics
+import selectors
+import signal
+import sys
+import argparse
+import socketserver
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qsl, urlencode, urljoin, unquote
+import urllib.error
+import urllib.request
+import base64
+import http.client
+import ssl
+import zlib
+import email.utils
+import itertools
+import xml.etree.ElementTree as ET
+
+# Итерация 28: brotli необязателен; без него сервер просто не получит "br" в Accept-Encoding
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Итерация 8: новый путь файлов
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -13,96 +46,1731 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # Итерация 5: Путь к файлу с прочитанными новостями
 READ_NEWS_FILE = os.path.join(BASE_DIR, "read_news.json")
 
+# Итерация 13: Журнал прочитанных новостей (до перехода на журналы по дням)
+READ_NEWS_JOURNAL = os.path.join(BASE_DIR, "read_news.log")
+
+# Итерация 14: Журналы прочитанных по дням и срок их хранения
+READ_NEWS_DIR = os.path.join(BASE_DIR, "read_news")
+READ_NEWS_RETENTION_DAYS = 7  # сколько дней помнить прочитанные новости
+
+# Итерация 10: Дисковый кэш лент (ETag/Last-Modified и разобранные записи)
+# Итерация 26: Прежние файлы кэша переносятся в снимок и удаляются
+FEED_CACHE_DIR = os.path.join(BASE_DIR, "feed_cache")
+FEED_SNAPSHOT_FILE = os.path.join(BASE_DIR, "feed_snapshot.db")
+
+# Итерация 11: Сколько секунд разобранная лента живет в памяти
+FEED_STORE_TTL = 600
+
+# Итерация 16: Сколько статей держать в памяти уже переведенными в текст
+ARTICLE_CACHE_SIZE = 64
+
+# Итерация 17: Сколько соседних статей готовить заранее вокруг выбранной
+PRERENDER_NEIGHBORS = 2
+
+# Итерация 18: Период фонового обновления всех лент, секунд
+# Итерация 19: Теперь это интервал для лент, ритм которых еще неизвестен
+BACKGROUND_REFRESH_INTERVAL = 600
+
+# Итерация 19: Границы адаптивного интервала опроса одной ленты, секунд
+REFRESH_MIN_INTERVAL = 5 * 60
+REFRESH_MAX_INTERVAL = 24 * 3600
+
+# Итерация 20: Сокет фонового демона, который загружает ленты для всех клиентов
+RSS_SOCKET_PATH = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or BASE_DIR, "get_rss.sock")
+DAEMON_REQUEST_TIMEOUT = 30  # Сколько клиент ждет ответа демона, секунд
+
+# Итерация 21: Полнотекстовый индекс статей и сколько дней он хранит историю
+SEARCH_INDEX_FILE = os.path.join(BASE_DIR, "rss_index.db")
+SEARCH_RETENTION_DAYS = 180
+SEARCH_EXPIRE_INTERVAL = 6 * 3600  # Как часто долгоживущий процесс чистит индекс, секунд
+SEARCH_RESULTS_LIMIT = 200
+
+# Итерация 22: Склейка одинаковых новостей из разных лент
+SIMHASH_MAX_DISTANCE = 6   # Сколько бит из 64 могут различаться у копий одной новости
+SIMHASH_MIN_TOKENS = 8     # Короче текст сравнивается только по адресу ссылки
+SIMHASH_MAX_TOKENS = 120   # Агентская новость узнается по началу текста
+TITLE_MIN_OVERLAP = 0.5    # Доля общих слов заголовков, чтобы похожий текст считался той же новостью
+
+# Итерация 24: Потоковый разбор лент
+STREAM_CHUNK_SIZE = 64 * 1024  # Сколько байт читать из сети за раз
+STREAM_KEEP_ENTRIES = 20       # Столько записей нужно publish_stats, даже вчерашних
+STREAM_OLD_STREAK = 3          # Столько старых записей подряд, чтобы перестать читать ленту
+
+# Итерация 25: Выгрузка замеров загрузки лент строками JSON
+FEED_STATS_FILE = os.path.join(BASE_DIR, "feed_stats.jsonl")
+
+# Итерация 9: Параметры параллельной загрузки лент
+FETCH_WORKERS = 8      # Общий размер пула потоков
+FETCH_PER_HOST = 2     # Не больше стольких одновременных запросов к одному хосту
+FETCH_TIMEOUT = 15     # Таймаут сетевых операций одной ленты, секунд
+
+# Итерация 28: Пул keep-alive соединений
+HTTP_IDLE_TIMEOUT = 60  # Сколько секунд держать простаивающее соединение
+HTTP_MAX_REDIRECTS = 5
+
+# Итерация 14: Журналы прочитанных новостей, по файлу на каждый день
+class ReadNewsJournal:
+    """Состояние прочтения: строки дописываются в журнал дня, старые дни удаляются файлами целиком"""
+
+    def __init__(self, directory=READ_NEWS_DIR, retention_days=READ_NEWS_RETENTION_DAYS,
+                 legacy_paths=(READ_NEWS_JOURNAL, READ_NEWS_FILE)):
+        self.directory = directory
+        self.retention_days = retention_days
+        self.legacy_paths = legacy_paths
+        self._index = None     # (лента, id) -> день прочтения; читается при первом обращении
+        self._buckets = {}     # день -> ключи, прочитанные в этот день
+        self._day = None       # текущий день, в журнал которого идут новые строки
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _bucket_path(self, day):
+        return os.path.join(self.directory, day + ".log")
+
+    def _oldest_day(self):
+        oldest = datetime.now() - timedelta(days=self.retention_days - 1)
+        return oldest.strftime("%Y-%m-%d")
+
+    def _load(self):
+        if self._index is not None:
+            return
+        self._index = {}
+        self._buckets = {}
+        
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+            self._import_legacy()
+        
+        oldest = self._oldest_day()
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".log"):
+                continue
+            day = name[:-len(".log")]
+            if day < oldest:
+                os.remove(self._bucket_path(day))
+                continue
+            self._read_bucket(day)
+        self._day = datetime.now().strftime("%Y-%m-%d")
+
+    def _read_bucket(self, day):
+        keys = self._buckets.setdefault(day, set())
+        with open(self._bucket_path(day), 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Оборванная строка после сбоя просто пропускается
+                    continue
+                key = (record["feed"], record["news_id"])
+                keys.add(key)
+                self._index[key] = day
+
+    def _import_legacy(self):
+        # Однократный перенос из read_news.log и read_news.json
+        by_day = defaultdict(list)
+        journal_path, json_path = self.legacy_paths
+        try:
+            if os.path.exists(journal_path):
+                with open(journal_path, 'r') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                            by_day[record["date"]].append(record)
+                        except (ValueError, KeyError):
+                            continue
+            elif os.path.exists(json_path):
+                with open(json_path, 'r') as f:
+                    for record in json.load(f).values():
+                        by_day[record["date"]].append(record)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return
+        
+        oldest = self._oldest_day()
+        for day, records in by_day.items():
+            if day < oldest:
+                continue
+            with open(self._bucket_path(day), 'a') as f:
+                for record in records:
+                    f.write(json.dumps({"feed": record["feed"], "news_id": record["news_id"]},
+                                       ensure_ascii=False) + "\n")
+
+    def _expire(self):
+        # После полуночи переключаемся на новый журнал и выбрасываем дни за окном хранения
+        today_str = datetime.now().strftime("%Y-%m-%d")
+        if today_str == self._day:
+            return
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._day = today_str
+        
+        oldest = self._oldest_day()
+        for day in [d for d in self._buckets if d < oldest]:
+            for key in self._buckets.pop(day):
+                if self._index.get(key) == day:
+                    del self._index[key]
+            try:
+                os.remove(self._bucket_path(day))
+            except OSError:
+                pass
+
+    def _append(self, record):
+        if self._file is None:
+            self._file = open(self._bucket_path(self._day), 'a+')
+            # Если прошлый сеанс оборвался посреди строки, начинаем с новой
+            if self._file.tell() > 0:
+                self._file.seek(self._file.tell() - 1)
+                if self._file.read(1) != "\n":
+                    self._file.write("\n")
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def is_read(self, feed_url, news_id):
+        with self._lock:
+            self._load()
+            # Окно хранения сдвигается в полночь, даже если сегодня еще ничего не отмечали
+            self._expire()
+            return (feed_url, news_id) in self._index
+
+    def mark(self, feed_url, news_id):
+        with self._lock:
+            self._load()
+            self._expire()
+            key = (feed_url, news_id)
+            if key in self._index:
+                return
+            self._index[key] = self._day
+            self._buckets.setdefault(self._day, set()).add(key)
+            self._append({"feed": feed_url, "news_id": news_id})
+
+    def expire(self):
+        with self._lock:
+            self._load()
+            self._expire()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
 # Итерация 5: Функция для загрузки прочитанных новостей
 def load_read_news():
-    if not os.path.exists(READ_NEWS_FILE):
-        return {}
-    
-    try:
-        with open(READ_NEWS_FILE, 'r') as f:
-            data = json.load(f)
-            # Итерация 5: Удаляем вчерашние записи
-            today_str = datetime.now().strftime("%Y-%m-%d")
-            return {k: v for k, v in data.items() if v["date"] == today_str}
-    except:
-        return {}
+    # Итерация 13: Журнал читается лениво, при первой проверке
+    return ReadNewsJournal()
 
 # Итерация 5: Функция для сохранения прочитанных новостей
 def save_read_news(read_news):
-    # Фильтруем только сегодняшние записи
-    today_str = datetime.now().strftime("%Y-%m-%d")
-    filtered = {k: v for k, v in read_news.items() if v["date"] == today_str}
-    
-    with open(READ_NEWS_FILE, 'w') as f:
-        json.dump(filtered, f)
+    # Итерация 13: Каждое прочтение уже на диске, здесь только уборка
+    # Итерация 14: Удаляем журналы дней за пределами срока хранения
+    read_news.expire()
+    read_news.close()
 
 # Итерация 5: Пометить новость как прочитанную
 def mark_as_read(read_news, feed_url, news_id):
-    today_str = datetime.now().strftime("%Y-%m-%d")
-    key = f"{feed_url}|{news_id}"
-    read_news[key] = {
-        "date": today_str,
-        "feed": feed_url,
-        "news_id": news_id
-    }
+    # Итерация 22: Прочитанная новость прочитана во всех лентах, где она вышла
+    for copy_feed, copy_id in duplicate_index.copies(feed_url, news_id):
+        if (copy_feed, copy_id) != (feed_url, news_id) and read_news.is_read(copy_feed, copy_id):
+            continue
+        # Итерация 13: Одна дописанная строка вместо перезаписи всего файла
+        read_news.mark(copy_feed, copy_id)
+        # Итерация 12: Счетчик ленты уменьшается сразу, без пересчета записей
+        counter = unread_counters.get(copy_feed)
+        if counter:
+            counter.mark_read(copy_id)
 
 # Итерация 5: Проверить, прочитана ли новость
 def is_news_read(read_news, feed_url, news_id):
-    key = f"{feed_url}|{news_id}"
-    return key in read_news
+    return read_news.is_read(feed_url, news_id)
 
-# Итерация 5: Подсчет непрочитанных новостей для ленты
-def count_unread_news(feed, read_news):
+# Итерация 26: Снимок разобранных лент в SQLite, записи сжаты zlib
+class FeedSnapshot:
+    """Последняя запись каждой ленты: с нее интерфейс стартует мгновенно и работает без сети"""
+
+    def __init__(self, path=FEED_SNAPSHOT_FILE, legacy_dir=FEED_CACHE_DIR):
+        self.path = path
+        self.legacy_dir = legacy_dir
+        self._conn = None  # открывается при первом обращении
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute('''CREATE TABLE IF NOT EXISTS feeds (
+                            url TEXT PRIMARY KEY,
+                            etag TEXT,
+                            modified TEXT,
+                            refresh_hint INTEGER,
+                            fetched_at REAL NOT NULL,
+                            entries BLOB NOT NULL)''')
+            self._import_legacy()
+        return self._conn
+
+    def _import_legacy(self):
+        # Итерация 10: Кэш лент лежал JSON-файлами по хэшу адреса
+        if not os.path.isdir(self.legacy_dir):
+            return
+        for name in os.listdir(self.legacy_dir):
+            path = os.path.join(self.legacy_dir, name)
+            try:
+                if name.endswith(".json"):
+                    with open(path, 'r') as f:
+                        record = json.load(f)
+                    self._write(record, os.path.getmtime(path))
+                os.remove(path)
+            except (OSError, ValueError, KeyError):
+                continue
+        try:
+            os.rmdir(self.legacy_dir)
+        except OSError:
+            pass
+
+    def _write(self, record, fetched_at):
+        entries = zlib.compress(json.dumps(record['entries'], ensure_ascii=False).encode("utf-8"))
+        with self._conn:
+            self._conn.execute('''INSERT OR REPLACE INTO feeds
+                        (url, etag, modified, refresh_hint, fetched_at, entries)
+                        VALUES (?, ?, ?, ?, ?, ?)''',
+                        (record['url'], record.get('etag'), record.get('modified'),
+                         record.get('refresh_hint'), fetched_at, entries))
+
+    def load(self, url):
+        """Запись ленты с полем fetched_at или None"""
+        with self._lock:
+            row = self._connection().execute(
+                '''SELECT url, etag, modified, refresh_hint, fetched_at, entries
+                   FROM feeds WHERE url = ?''', (url,)).fetchone()
+        if row is None:
+            return None
+        url, etag, modified, hint, fetched_at, entries = row
+        return {
+            'url': url,
+            'etag': etag,
+            'modified': modified,
+            'refresh_hint': hint,
+            'fetched_at': fetched_at,
+            'entries': json.loads(zlib.decompress(entries)),
+        }
+
+    def save(self, record):
+        with self._lock:
+            self._connection()
+            self._write(record, time.time())
+
+feed_snapshot = FeedSnapshot()
+
+def load_feed_cache(url):
     try:
-        d = feedparser.parse(feed['link'])
-    except:
-        return 0
+        return feed_snapshot.load(url)
+    except (sqlite3.Error, zlib.error, ValueError):
+        return None
+
+def save_feed_cache(record):
+    feed_snapshot.save(record)
+
+# Итерация 10: Оставляем от записи ленты только то, что нужно интерфейсу
+def compact_entry(entry):
+    published = entry.get('published_parsed')
+    return {
+        'id': entry.get("id", entry.get("link", entry.get("title", ""))),
+        'title': entry.get('title', ''),
+        'link': entry.get('link', ''),
+        'description': entry.get('description'),
+        'published_parsed': list(published[:6]) if published else None,
+    }
+
+# Итерация 19: Подсказка сервера, как часто имеет смысл спрашивать ленту
+def refresh_hint(d):
+    """Большее из <ttl> ленты и Cache-Control: max-age, в секундах"""
+    hints = []
+    try:
+        hints.append(int(d.get('feed', {}).get('ttl')) * 60)
+    except (TypeError, ValueError):
+        pass
+    headers = {k.lower(): v for k, v in (d.get('headers') or {}).items()}
+    match = re.search(r"max-age=(\d+)", headers.get('cache-control', ''))
+    if match:
+        hints.append(int(match.group(1)))
+    return max(hints) if hints else None
+
+# Итерация 24: Ленту не удалось разобрать потоком, ее разбирает feedparser
+class FeedFormatError(ValueError):
+    pass
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+CONTENT_NS = "{http://purl.org/rss/1.0/modules/content/}"
+
+# Итерация 24: Разбор RSS 2.0 и Atom по мере загрузки, без дерева всего документа
+class FeedStreamParser:
+    """Записи в формате compact_entry; останавливается, когда упорядоченная по дате лента
+    дошла до записей старше начала дня"""
+
+    def __init__(self, base_url, today_start):
+        self.base_url = base_url
+        self.today_start = today_start
+        self.entries = []
+        self.ttl = None
+        self.raw = []            # Прочитанные байты на случай разбора через feedparser
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack = []
+        self._format = None
+        self._ordered = True     # Пока каждая следующая запись не новее предыдущей
+        self._last_published = None
+        self._old_streak = 0
+
+    def feed(self, data):
+        """Скармливает очередной кусок; True - дальше читать не нужно"""
+        self.raw.append(data)
+        self._parser.feed(data)
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if not self._stack:
+                    self._detect_format(elem)
+                self._stack.append(elem)
+                continue
+            
+            self._stack.pop()
+            if self._format == "rss" and elem.tag == "item":
+                self._add(self._rss_entry(elem))
+            elif self._format == "atom" and elem.tag == ATOM_NS + "entry":
+                self._add(self._atom_entry(elem))
+            elif self._format == "rss" and elem.tag == "ttl" and len(self._stack) == 2:
+                self.ttl = (elem.text or "").strip()
+            else:
+                continue
+            # Разобранная запись больше не нужна, дерево не растет вместе с лентой
+            self._stack[-1].remove(elem)
+            if self._done():
+                return True
+        return False
+
+    def close(self):
+        self._parser.close()
+
+    def _detect_format(self, root):
+        if root.tag == "rss":
+            self._format = "rss"
+        elif root.tag == ATOM_NS + "feed":
+            self._format = "atom"
+        else:
+            raise FeedFormatError(f"неизвестный формат ленты: {root.tag}")
+
+    def _add(self, entry):
+        published = entry['published_parsed']
+        if published:
+            if self._last_published and published > self._last_published:
+                self._ordered = False
+            self._last_published = published
+            if datetime(*published, tzinfo=timezone.utc) < self.today_start:
+                self._old_streak += 1
+            else:
+                self._old_streak = 0
+        self.entries.append(entry)
+
+    def _done(self):
+        return (self._ordered and self._old_streak >= STREAM_OLD_STREAK
+                and len(self.entries) >= STREAM_KEEP_ENTRIES)
+
+    @staticmethod
+    def _text(elem, tag):
+        child = elem.find(tag)
+        if child is None:
+            return None
+        return (child.text or "").strip()
+
+    @staticmethod
+    def _date(text, parse):
+        if not text:
+            return None
+        try:
+            value = parse(text)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return list(value.astimezone(timezone.utc).timetuple()[:6])
+
+    def _rss_entry(self, item):
+        # id и ссылки как у feedparser, чтобы не потерять состояние прочтения
+        link = self._text(item, "link")
+        guid_elem = item.find("guid")
+        guid = (guid_elem.text or "").strip() if guid_elem is not None else None
+        if guid and guid_elem.get("isPermaLink", "true").lower() != "false":
+            guid = urljoin(self.base_url, guid)
+        link = urljoin(self.base_url, link) if link else link
+        return compact_entry({
+            'id': guid or link or self._text(item, "title") or "",
+            'title': self._text(item, "title") or "",
+            'link': link or "",
+            # Как и feedparser, без <description> текст берется из content:encoded
+            'description': (self._text(item, "description")
+                            or self._text(item, CONTENT_NS + "encoded")),
+            'published_parsed': self._date(self._text(item, "pubDate"),
+                                           email.utils.parsedate_to_datetime),
+        })
+
+    @staticmethod
+    def _atom_text(elem):
+        """Текст элемента Atom; у type="xhtml" сохраняется разметка без пространства имен"""
+        if elem.get("type") != "xhtml":
+            return "".join(elem.itertext()).strip()
+        # Содержимое xhtml обернуто в <div>, который, как и feedparser, отбрасываем
+        wrapper = elem[0] if len(elem) == 1 and elem[0].tag.endswith("}div") else elem
+        for child in wrapper.iter():
+            if isinstance(child.tag, str):
+                child.tag = child.tag.rpartition("}")[2]
+        parts = [wrapper.text or ""]
+        parts.extend(ET.tostring(child, encoding="unicode") for child in wrapper)
+        return "".join(parts).strip()
+
+    def _atom_entry(self, entry):
+        link = None
+        for link_elem in entry.findall(ATOM_NS + "link"):
+            if link_elem.get("rel", "alternate") == "alternate":
+                link = urljoin(self.base_url, link_elem.get("href", ""))
+                break
+        description = None
+        for tag in ("summary", "content"):
+            elem = entry.find(ATOM_NS + tag)
+            if elem is not None:
+                description = self._atom_text(elem)
+                break
+        title = self._text(entry, ATOM_NS + "title") or ""
+        return compact_entry({
+            'id': self._text(entry, ATOM_NS + "id") or link or title,
+            'title': title,
+            'link': link or "",
+            'description': description,
+            'published_parsed': self._date(self._text(entry, ATOM_NS + "published"),
+                                           datetime.fromisoformat),
+        })
+
+def _read_response(response, metrics):
+    """Куски тела ответа, распакованные из gzip/deflate/br"""
+    encoding = (response.headers.get("Content-Encoding") or "").lower()
+    if encoding in ("gzip", "deflate"):
+        decompress = zlib.decompressobj(32 + zlib.MAX_WBITS).decompress
+    elif encoding == "br" and brotli is not None:
+        decompress = brotli.Decompressor().process
+    else:
+        decompress = None
+    while True:
+        chunk = response.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        # Итерация 25: Считаются байты из сети, до распаковки
+        metrics['bytes'] += len(chunk)
+        yield decompress(chunk) if decompress else chunk
+
+# Итерация 25: Соединения, которые замеряют DNS и установку связи
+class _TimedConnectionMixin:
+    def __init__(self, *args, metrics, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+        self._create_connection = self._timed_create_connection
+
+    def _timed_create_connection(self, address, timeout, source_address=None):
+        host, port = address
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        finally:
+            # Медленный отказ DNS тоже должен быть виден
+            self.metrics['dns'] += time.perf_counter() - started
+        
+        error = None
+        for family, sock_type, proto, _, sockaddr in addresses:
+            sock = socket.socket(family, sock_type, proto)
+            try:
+                if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(sockaddr)
+            except OSError as e:
+                error = e
+                sock.close()
+                continue
+            return sock
+        raise error or OSError(f"{host}: адрес не найден")
+
+    def connect(self):
+        # Все, кроме DNS: TCP, а для HTTPS еще и рукопожатие TLS
+        started = time.perf_counter()
+        dns = self.metrics['dns']
+        super().connect()
+        self.metrics['connect'] += time.perf_counter() - started - (self.metrics['dns'] - dns)
+
+class TimedHTTPConnection(_TimedConnectionMixin, http.client.HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(_TimedConnectionMixin, http.client.HTTPSConnection):
+    pass
+
+# Итерация 28: Ответ из пула; закрытие возвращает соединение в пул, если тело дочитано
+class PooledResponse:
+    def __init__(self, pool, key, conn, response, url):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    def read(self, amount=None):
+        return self._response.read(amount)
+
+    def geturl(self):
+        return self.url
+
+    def close(self):
+        if self._conn is None:
+            return
+        # Недочитанное тело (лента разобрана до вчерашних записей) не дает переиспользовать соединение
+        reusable = self._response.isclosed() and not self._response.will_close
+        self._pool._release(self._key, self._conn, reusable)
+        self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Итерация 28: Общие keep-alive соединения: DNS и TLS - один раз на хост, а не на каждый опрос
+class HTTPConnectionPool:
+    """Не больше per_host соединений к одному хосту; простаивающие ждут следующего запроса.
+    Прокси берутся из окружения (http_proxy, https_proxy, no_proxy), как у urllib"""
+
+    # Ошибки, после которых запрос по старому соединению повторяется по новому
+    STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                    ConnectionResetError, BrokenPipeError)
+
+    def __init__(self, per_host=FETCH_PER_HOST, idle_timeout=HTTP_IDLE_TIMEOUT, timeout=FETCH_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.ssl_context = ssl.create_default_context()
+        self.proxies = urllib.request.getproxies()
+        self._lock = threading.Lock()
+        self._idle = defaultdict(list)  # (схема, хост, порт, прокси) -> [(соединение, время освобождения)]
+        self._slots = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+
+    def _proxy(self, scheme, host):
+        """(хост, порт, Proxy-Authorization или None) прокси для адреса или None"""
+        proxy = self.proxies.get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+        if "://" not in proxy:
+            proxy = "http://" + proxy
+        parts = urlparse(proxy)
+        auth = None
+        if parts.username is not None:
+            credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            auth = "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+        return (parts.hostname, parts.port or 80, auth)
+
+    def _acquire(self, key, metrics):
+        scheme, host, port, proxy = key
+        with self._lock:
+            slots = self._slots[key]
+        if not slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"{host}: нет свободного соединения")
+        
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle[key]
+            while idle:
+                conn, released = idle.pop()
+                if now - released < self.idle_timeout:
+                    conn.metrics = metrics
+                    return conn, True
+                conn.close()
+        
+        # Через прокси HTTPS идет туннелем CONNECT, а HTTP - запросами к самому прокси
+        connect_host, connect_port = (proxy[0], proxy[1]) if proxy else (host, port)
+        if scheme == "https":
+            conn = TimedHTTPSConnection(connect_host, connect_port, timeout=self.timeout,
+                                        context=self.ssl_context, metrics=metrics)
+            if proxy:
+                conn.set_tunnel(host, port,
+                                headers={"Proxy-Authorization": proxy[2]} if proxy[2] else None)
+        else:
+            conn = TimedHTTPConnection(connect_host, connect_port, timeout=self.timeout,
+                                       metrics=metrics)
+        return conn, False
+
+    def _release(self, key, conn, reusable):
+        if reusable:
+            with self._lock:
+                self._idle[key].append((conn, time.monotonic()))
+        else:
+            conn.close()
+        self._slots[key].release()
+
+    def request(self, url, headers, metrics):
+        """GET с переходом по перенаправлениям; ответ нужно закрыть"""
+        for _ in range(HTTP_MAX_REDIRECTS + 1):
+            parts = urlparse(url)
+            if parts.scheme not in ("http", "https"):
+                raise ValueError(f"неподдерживаемая схема: {url}")
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            proxy = self._proxy(parts.scheme, parts.hostname)
+            key = (parts.scheme, parts.hostname, port, proxy)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            if proxy and parts.scheme == "http":
+                # HTTP-прокси получает полный адрес
+                path = f"http://{parts.netloc.rpartition('@')[2]}{path}"
+                if proxy[2]:
+                    headers = dict(headers, **{"Proxy-Authorization": proxy[2]})
+            
+            conn, reused = self._acquire(key, metrics)
+            try:
+                try:
+                    conn.request("GET", path, headers=headers)
+                    response = conn.getresponse()
+                except self.STALE_ERRORS:
+                    if not reused:
+                        raise
+                    # Сервер успел закрыть простаивавшее соединение
+                    conn.close()
+                    conn.request("GET", path, headers=headers)
+                    response = conn.getresponse()
+            except BaseException:
+                self._release(key, conn, False)
+                raise
+            
+            pooled = PooledResponse(self, key, conn, response, url)
+            location = response.getheader("Location")
+            if response.status in (301, 302, 303, 307, 308) and location:
+                response.read()
+                pooled.close()
+                url = urljoin(url, location)
+                continue
+            return pooled
+        raise http.client.HTTPException(f"слишком много перенаправлений: {url}")
+
+    def close(self):
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn, _ in conns]
+            self._idle.clear()
+        for conn in idle:
+            conn.close()
+
+http_pool = HTTPConnectionPool()
+
+# Итерация 25: Последние замеры загрузки каждой ленты
+class FeedStats:
+    """Время DNS/соединения/передачи/разбора, байты, записи, кэш и ошибка по адресу ленты"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = {}
+
+    def record(self, metrics):
+        with self._lock:
+            self._latest[metrics['url']] = metrics
+
+    def snapshot(self):
+        with self._lock:
+            return [dict(metrics) for metrics in self._latest.values()]
+
+feed_stats = FeedStats()
+
+def export_feed_stats(rows, path=FEED_STATS_FILE):
+    """Дописывает замеры в файл строками JSON"""
+    with open(path, "a", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return path
+
+# Итерация 10: Загрузка ленты условным запросом
+# Итерация 25: Каждая загрузка оставляет замеры в feed_stats, в том числе неудачная
+def fetch_feed(url, today_start=None):
+    """Возвращает запись кэша ленты; при ответе 304 записи берутся с диска"""
+    metrics = {
+        'url': url, 'time': time.time(), 'dns': 0.0, 'connect': 0.0, 'transfer': 0.0,
+        'parse': 0.0, 'total': 0.0, 'bytes': 0, 'entries': 0, 'cache': "miss", 'error': None,
+    }
+    started = time.perf_counter()
+    try:
+        record = _fetch_feed(url, today_start, metrics)
+    except Exception as e:
+        metrics['error'] = str(e)
+        raise
+    else:
+        metrics['entries'] = len(record['entries'])
+        if record.get('error'):
+            metrics['error'] = record['error']
+            metrics['cache'] = "stale"
+        return record
+    finally:
+        metrics['total'] = time.perf_counter() - started
+        feed_stats.record(metrics)
+
+def _fetch_feed(url, today_start, metrics):
+    cached = load_feed_cache(url)
+    if today_start is None:
+        today_start = today_start_utc()
+    
+    # Итерация 24: Лента загружается напрямую, чтобы разбирать ее прямо из сокета
+    headers = {
+        'User-Agent': feedparser.USER_AGENT,
+        'Accept-Encoding': "gzip, deflate, br" if brotli is not None else "gzip, deflate",
+    }
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('modified'):
+            headers['If-Modified-Since'] = cached['modified']
+    
+    # Итерация 28: Запрос идет через общий пул соединений
+    request_started = time.perf_counter()
+    try:
+        response = http_pool.request(url, headers, metrics)
+    except (OSError, http.client.HTTPException, ValueError) as e:
+        error = e
+    else:
+        error = None
+        if response.status >= 300:
+            response.read()
+            response.close()
+            if cached and response.status == 304:
+                metrics['cache'] = "hit"
+                metrics['transfer'] = time.perf_counter() - request_started - metrics['dns'] - metrics['connect']
+                # Итерация 19: Ответ 304 тоже может обновить подсказку об интервале
+                hint = refresh_hint({'headers': dict(response.headers)})
+                if hint is not None:
+                    return dict(cached, refresh_hint=hint)
+                return cached
+            error = urllib.error.HTTPError(response.url, response.status, response.reason,
+                                           response.headers, None)
+    
+    if error is None:
+        with response:
+            response_headers = response.headers
+            parser = FeedStreamParser(response.geturl(), today_start)
+            chunks = _read_response(response, metrics)
+            try:
+                for chunk in chunks:
+                    parse_started = time.perf_counter()
+                    done = parser.feed(chunk)
+                    metrics['parse'] += time.perf_counter() - parse_started
+                    if done:
+                        break
+                else:
+                    parser.close()
+                d = {'feed': {'ttl': parser.ttl}, 'headers': response_headers}
+                entries = parser.entries
+            except (ET.ParseError, FeedFormatError):
+                # Другой формат или вольности, которые прощает только feedparser
+                raw = b"".join(parser.raw) + b"".join(chunks)
+                parse_started = time.perf_counter()
+                d = feedparser.parse(raw, response_headers=dict(
+                    response_headers.items(), **{'content-location': response.geturl()}))
+                entries = [compact_entry(entry) for entry in d.entries]
+                metrics['parse'] += time.perf_counter() - parse_started
+                if d.get('bozo') and not entries:
+                    error = d.get('bozo_exception') or ValueError("Не удалось разобрать ленту")
+            except (OSError, http.client.HTTPException, zlib.error) as e:
+                error = e
+        metrics['transfer'] = (time.perf_counter() - request_started - metrics['dns']
+                               - metrics['connect'] - metrics['parse'])
     
-    today_start = datetime.now(timezone.utc).replace(
+    if error is not None:
+        # Сеть или разбор не удались: лучше показать прошлые записи
+        if cached:
+            # Итерация 19: Ошибку видит планировщик, чтобы отложить следующий опрос
+            return dict(cached, error=str(error))
+        raise error
+    
+    record = {
+        'url': url,
+        'etag': response_headers.get('ETag'),
+        'modified': response_headers.get('Last-Modified'),
+        'refresh_hint': refresh_hint(d),
+        'entries': entries,
+    }
+    try:
+        save_feed_cache(record)
+    except (OSError, sqlite3.Error):
+        pass
+    return record
+
+# Итерация 11: Начало сегодняшнего дня, от него отсчитываются новости
+def today_start_utc():
+    return datetime.now(timezone.utc).replace(
         hour=0, minute=0, second=0, microsecond=0
     )
-    unread_count = 0
+
+# Итерация 11: Только сегодняшние записи, от новых к старым
+def filter_today_entries(entries, today_start):
+    news_items = []
     
-    for entry in d.entries:
-        if not hasattr(entry, 'published_parsed'):
+    for entry in entries:
+        if not entry['published_parsed']:
             continue
             
-        pub_time = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
+        pub_time = datetime(*entry['published_parsed'][:6], tzinfo=timezone.utc)
         
         if pub_time >= today_start:
-            news_id = entry.get("id", entry.get("link", entry.title))
-            if not is_news_read(read_news, feed['link'], news_id):
-                unread_count += 1
-                
-    return unread_count
+            news_items.append({
+                'title': entry['title'],
+                'time': pub_time.astimezone().strftime("%H:%M"),
+                'published': pub_time,
+                'entry': entry,
+                'id': entry['id']
+            })
 
-# Итерация 6: Функция для периодической проверки обновлений
-def background_updater(feeds, read_news, feed_unread_counts, update_event, refresh_callback):
-    """Фоновый поток для проверки обновлений"""
-    while True:
-        # Ждем 10 минут (600 секунд)
-        time.sleep(600)
+    news_items.sort(key=lambda x: x['published'], reverse=True)
+    return news_items
+
+# Итерация 19: Типичный промежуток между публикациями ленты и возраст последней
+def publish_stats(entries, limit=20):
+    times = sorted(
+        calendar.timegm(entry['published_parsed'][:6])
+        for entry in entries if entry['published_parsed']
+    )[-limit:]
+    if not times:
+        return None, None
+    gaps = [later - earlier for earlier, later in zip(times, times[1:]) if later > earlier]
+    # По одному-двум промежуткам ритм ленты не оценить
+    median_gap = statistics.median(gaps) if len(gaps) >= 3 else None
+    return median_gap, time.time() - times[-1]
+
+# Итерация 22: Адрес статьи без меток трекинга, www и хвостового слэша
+def normalize_url(link):
+    if not link:
+        return None
+    parts = urlparse(link.strip())
+    if not parts.netloc:
+        return None
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query)
+        if not key.startswith("utm_") and key not in ("fbclid", "gclid")
+    ))
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{query}" if query else "")
+
+# Итерация 22: SimHash по словам заголовка и описания
+def simhash(entry):
+    """64-битный отпечаток текста или None, если текста слишком мало"""
+    text = f"{entry.get('title') or ''} {entry.get('description') or ''}"
+    tokens = re.findall(r"\w+", re.sub(r"<[^>]*>", " ", text).lower())[:SIMHASH_MAX_TOKENS]
+    if len(tokens) < SIMHASH_MIN_TOKENS:
+        return None
+    
+    # Хэш каждого слова строкой из 64 нулей и единиц; бит отпечатка - большинство по столбцу.
+    # Шинглы из нескольких слов на коротких анонсах слишком чувствительны к правкам редакций
+    hashes = [
+        format(int.from_bytes(hashlib.blake2b(
+            token.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+        for token in tokens
+    ]
+    half = len(hashes) / 2
+    fingerprint = 0
+    for column in zip(*hashes):
+        fingerprint = (fingerprint << 1) | (column.count("1") > half)
+    return fingerprint
+
+# Итерация 22: Одинаковые подписи вроде "Подробнее на сайте" дают близкий SimHash у разных новостей,
+# поэтому совпадение отпечатков принимается только вместе с похожими заголовками
+def title_tokens(entry):
+    """Множество слов заголовка без разметки"""
+    title = re.sub(r"<[^>]*>", " ", entry.get('title') or '')
+    return frozenset(re.findall(r"\w+", title.lower()))
+
+def titles_alike(first, second):
+    """Заголовки похожи, если у них много общих слов (мера Жаккара)"""
+    if not first or not second:
+        return False
+    return len(first & second) / len(first | second) >= TITLE_MIN_OVERLAP
+
+# Итерация 22: Группы копий одной новости во всех лентах
+class DuplicateIndex:
+    """Первая увиденная копия новости основная, остальные скрываются из списков и счетчиков.
+    
+    Похожие отпечатки ищутся через LSH: 64 бита делятся на SIMHASH_MAX_DISTANCE + 1 полос,
+    и при расстоянии не больше порога хотя бы одна полоса совпадает целиком.
+    Копии ищутся только в других лентах: две записи одной ленты всегда разные новости.
+    """
+
+    BANDS = SIMHASH_MAX_DISTANCE + 1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._group_ids = itertools.count(1)
+        self._group = {}                   # (лента, id) -> номер группы
+        self._members = defaultdict(list)  # номер группы -> все копии, первая основная
+        self._by_url = {}                  # нормализованный адрес -> номер группы
+        self._buckets = defaultdict(list)  # (полоса, значение) -> [(отпечаток, слова заголовка, номер группы)]
+        self._group_urls = defaultdict(set)   # номер группы -> ее адреса в _by_url
+        self._group_bands = defaultdict(list) # номер группы -> ее полосы в _buckets
+        self._feed_keys = defaultdict(set) # лента -> ее записи в индексе
+
+    def _bands(self, fingerprint):
+        width = 64 // self.BANDS
+        mask = (1 << width) - 1
+        return [(band, (fingerprint >> (band * width)) & mask) for band in range(self.BANDS)]
+
+    def _has_feed(self, group, feed_url):
+        return any(member[0] == feed_url for member in self._members[group])
+
+    def _find(self, feed_url, url, fingerprint, title):
+        if url and url in self._by_url:
+            group = self._by_url[url]
+            if not self._has_feed(group, feed_url):
+                return group
+        if fingerprint is None:
+            return None
+        for band in self._bands(fingerprint):
+            for other, other_title, group in self._buckets.get(band, ()):
+                if (bin(fingerprint ^ other).count("1") <= SIMHASH_MAX_DISTANCE
+                        and titles_alike(title, other_title)
+                        and not self._has_feed(group, feed_url)):
+                    return group
+        return None
+
+    def _add(self, key, entry):
+        url = normalize_url(entry.get('link'))
+        fingerprint = simhash(entry)
+        title = title_tokens(entry)
+        group = self._find(key[0], url, fingerprint, title)
+        if group is None:
+            group = next(self._group_ids)
+            if fingerprint is not None:
+                for band in self._bands(fingerprint):
+                    self._buckets[band].append((fingerprint, title, group))
+                    self._group_bands[group].append(band)
+        if url and url not in self._by_url:
+            self._by_url[url] = group
+            self._group_urls[group].add(url)
+        self._group[key] = group
+        self._members[group].append(key)
+
+    def _remove(self, key):
+        group = self._group.pop(key)
+        members = self._members[group]
+        # Если ушла основная копия, основной становится следующая по порядку
+        members.remove(key)
+        if members:
+            return
+        # Группа опустела: убираем ее адреса и полосы по обратным ссылкам
+        del self._members[group]
+        for url in self._group_urls.pop(group, ()):
+            del self._by_url[url]
+        for band in self._group_bands.pop(group, ()):
+            self._buckets[band] = [item for item in self._buckets[band] if item[2] != group]
+            if not self._buckets[band]:
+                del self._buckets[band]
+
+    def _is_primary(self, key):
+        return self._members[self._group[key]][0] == key
+
+    def primary_entries(self, feed_url, entries):
+        """Учитывает записи ленты и возвращает только те, что не повторяют уже виденные"""
+        with self._lock:
+            keys = {(feed_url, entry['id']) for entry in entries}
+            # Записи, которых больше нет в ленте, не должны держать группы вечно
+            for key in self._feed_keys[feed_url] - keys:
+                self._remove(key)
+            for entry in entries:
+                key = (feed_url, entry['id'])
+                if key not in self._group:
+                    self._add(key, entry)
+            self._feed_keys[feed_url] = keys
+            return [entry for entry in entries if self._is_primary((feed_url, entry['id']))]
+
+    def copies(self, feed_url, news_id):
+        """Все известные копии новости, включая ее саму"""
+        key = (feed_url, news_id)
+        with self._lock:
+            group = self._group.get(key)
+            return list(self._members[group]) if group is not None else [key]
+
+duplicate_index = DuplicateIndex()
+
+# Итерация 11: Общее хранилище разобранных лент
+class FeedStore:
+    """Отфильтрованные записи лент в памяти по адресу ленты, с TTL"""
+
+    def __init__(self, ttl=FEED_STORE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._feeds = {}                             # url -> (время загрузки, начало дня, записи)
+        self._fetch_locks = defaultdict(threading.Lock)  # url -> блокировка загрузки
+        self._info = {}                              # url -> сведения о последней загрузке
+        self.index = None                            # Итерация 21: SearchIndex, если поиск включен
+
+    def info(self, url):
+        """Итог последней загрузки: ошибка, подсказка сервера, ритм публикаций"""
+        with self._lock:
+            return dict(self._info.get(url, {}))
+
+    def get(self, url, max_age=None):
+        """Записи ленты не старше max_age секунд; при необходимости загружает ее"""
+        if max_age is None:
+            max_age = self.ttl
+        today_start = today_start_utc()
+        with self._lock:
+            fetch_lock = self._fetch_locks[url]
         
-        # Итерация 6: Проверяем, нужно ли обновлять
-        if update_event.is_set():
-            # Итерация 6: Обновляем счетчики для всех лент
-            for feed in feeds:
+        # Одну ленту одновременно загружает только один поток, остальные ждут его результат
+        # Итерация 26: Если есть сегодняшние записи из снимка, ждать загрузку не нужно
+        with self._lock:
+            cached = self._feeds.get(url)
+        has_today = cached is not None and cached[1] == today_start
+        if not fetch_lock.acquire(blocking=not has_today):
+            return cached[2]
+        try:
+            with self._lock:
+                cached = self._feeds.get(url)
+            if (cached and cached[1] == today_start
+                    and time.time() - cached[0] < max_age):
+                return cached[2]
+            
+            try:
+                record = fetch_feed(url, today_start)
+            except Exception as e:
+                with self._lock:
+                    self._info[url] = {'error': str(e)}
+                raise
+            
+            # Итерация 21: Новые записи сразу попадают в поисковый индекс
+            if self.index is not None:
                 try:
-                    new_count = count_unread_news(feed, read_news)
-                    if new_count != feed_unread_counts.get(feed['name'], 0):
-                        feed_unread_counts[feed['name']] = new_count
-                        # Итерация 6: Уведомляем главный поток о необходимости обновления
-                        refresh_callback()
-                except Exception as e:
-                    # Итерация 6: Ошибки логируем, но не прерываем поток
+                    self.index.add_entries(url, record['entries'])
+                except sqlite3.Error:
                     pass
+            
+            return self._store(url, record, today_start, time.time())
+        finally:
+            fetch_lock.release()
+
+    def _store(self, url, record, today_start, fetched_at):
+        # Итерация 22: Копии новостей из других лент в список и счетчик не попадают
+        entries = duplicate_index.primary_entries(url, record['entries'])
+        items = filter_today_entries(entries, today_start)
+        median_gap, newest_age = publish_stats(record['entries'])
+        with self._lock:
+            self._feeds[url] = (fetched_at, today_start, items)
+            self._info[url] = {
+                'error': record.get('error'),
+                # Итерация 26: Сеть не ответила, и записи взяты из снимка
+                'from_snapshot': record.get('error') is not None,
+                'refresh_hint': record.get('refresh_hint'),
+                'median_gap': median_gap,
+                'newest_age': newest_age,
+            }
+        return items
+
+    def cached(self, url):
+        """Сегодняшние записи ленты, если они уже в памяти, без загрузки; иначе None"""
+        with self._lock:
+            cached = self._feeds.get(url)
+        if cached is None or cached[1] != today_start_utc():
+            return None
+        return cached[2]
+
+    def preload(self, urls):
+        """Итерация 26: Записи из снимка, пока сеть не ответила; url -> записи"""
+        today_start = today_start_utc()
+        loaded = {}
+        for url in urls:
+            record = load_feed_cache(url)
+            if record is None:
+                continue
+            with self._lock:
+                if url in self._feeds:
+                    continue
+            # Время загрузки из снимка: устаревшая лента все равно будет перезагружена
+            loaded[url] = self._store(url, record, today_start, record['fetched_at'])
+        return loaded
+
+    def refresh(self, url):
+        return self.get(url, max_age=0)
+
+feed_store = FeedStore()
+
+# Итерация 12: Инкрементальный счетчик непрочитанных одной ленты
+class UnreadCounter:
+    """Хранит id сегодняшних записей ленты и множество непрочитанных среди них"""
+
+    def __init__(self, feed_url):
+        self.feed_url = feed_url
+        self.today_ids = set()
+        self.unread = set()
+        self._source = None  # последний учтенный список записей из FeedStore
+        self._lock = threading.Lock()
+
+    def update(self, news_items, read_news):
+        """Учитывает новые записи; уже известные не проверяются повторно"""
+        with self._lock:
+            # FeedStore отдает тот же список, пока лента не перезагружена
+            if news_items is self._source:
+                return
+            current_ids = {item['id'] for item in news_items}
+            for news_id in current_ids - self.today_ids:
+                if not is_news_read(read_news, self.feed_url, news_id):
+                    self.unread.add(news_id)
+            # Записи, пропавшие из ленты (или вчерашние после полуночи), больше не считаются
+            self.unread &= current_ids
+            self.today_ids = current_ids
+            self._source = news_items
+
+    def mark_read(self, news_id):
+        with self._lock:
+            self.unread.discard(news_id)
+
+    @property
+    def count(self):
+        return len(self.unread)
+
+# Итерация 12: Счетчики всех лент по адресу ленты
+unread_counters = {}
+_unread_counters_lock = threading.Lock()
+
+def get_unread_counter(feed_url):
+    with _unread_counters_lock:
+        counter = unread_counters.get(feed_url)
+        if counter is None:
+            counter = UnreadCounter(feed_url)
+            unread_counters[feed_url] = counter
+        return counter
+
+# Итерация 5: Подсчет непрочитанных новостей для ленты
+def count_unread_news(feed, read_news, refresh=False):
+    try:
+        # Итерация 11: Берем записи из общего хранилища вместо нового разбора
+        if refresh:
+            news_items = feed_store.refresh(feed['link'])
+        else:
+            news_items = feed_store.get(feed['link'])
+    except:
+        return 0
+    
+    # Итерация 12: Счетчик просматривает только записи, появившиеся с прошлого раза
+    counter = get_unread_counter(feed['link'])
+    counter.update(news_items, read_news)
+    return counter.count
+
+# Итерация 26: Счетчики по снимку лент, без обращения к сети
+def preload_unread_counts(feeds, read_news):
+    """Список (лента, непрочитано) для лент, которые есть в снимке"""
+    preloaded = feed_store.preload([feed['link'] for feed in feeds])
+    counts = []
+    for feed in feeds:
+        news_items = preloaded.get(feed['link'])
+        if news_items is not None:
+            counter = get_unread_counter(feed['link'])
+            counter.update(news_items, read_news)
+            counts.append((feed, counter.count))
+    return counts
+
+# Итерация 9: Параллельная загрузка лент с ограничением запросов на хост
+class FeedFetcher:
+    """Ограниченный пул потоков для загрузки лент"""
+
+    def __init__(self, max_workers=FETCH_WORKERS, per_host=FETCH_PER_HOST):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="rss-fetch")
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._active = defaultdict(int)     # хост -> число запросов в работе
+        self._pending = defaultdict(deque)  # хост -> очередь ожидающих задач
+
+    def submit(self, feed, func, on_done):
+        """Ставит ленту в очередь; on_done(feed, result, error) вызывается из рабочего потока"""
+        future = Future()
+        host = urlparse(feed['link']).netloc.lower()
+        job = (host, feed, func, on_done, future)
+        with self._lock:
+            if self._active[host] >= self.per_host:
+                # Хост занят: задача стартует, когда освободится слот
+                self._pending[host].append(job)
+                return future
+            self._active[host] += 1
+        self.executor.submit(self._run, job)
+        return future
+
+    def _run(self, job):
+        host, feed, func, on_done, future = job
+        result, error = None, None
+        try:
+            result = func(feed)
+        except Exception as e:
+            error = e
+        try:
+            on_done(feed, result, error)
+        finally:
+            future.set_result(result)
+            # Освобождаем слот хоста или сразу передаем его следующей ленте
+            with self._lock:
+                if self._pending[host]:
+                    next_job = self._pending[host].popleft()
+                else:
+                    next_job = None
+                    self._active[host] -= 1
+            if next_job:
+                self.executor.submit(self._run, next_job)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+# Итерация 9: Запуск подсчета непрочитанных по всем лентам сразу
+def fetch_unread_counts(fetcher, feeds, read_news, on_count, refresh=False):
+    """Результаты приходят в on_count(feed, count) по мере готовности каждой ленты"""
+    def done(feed, count, error):
+        if error is None:
+            on_count(feed, count)
+
+    return [
+        fetcher.submit(feed, lambda f: count_unread_news(f, read_news, refresh), done)
+        for feed in feeds
+    ]
+
+# Итерация 19: Планировщик опроса, подстраивающийся под каждую ленту
+class RefreshScheduler:
+    """Куча (время следующего опроса, лента) с интервалом по ритму публикаций и ошибкам"""
+
+    def __init__(self, default_interval=BACKGROUND_REFRESH_INTERVAL,
+                 min_interval=REFRESH_MIN_INTERVAL, max_interval=REFRESH_MAX_INTERVAL):
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._heap = []
+        self._seq = 0        # порядок добавления, чтобы куча не сравнивала словари лент
+        self._failures = {}  # адрес ленты -> ошибок подряд
+
+    def interval_for(self, feed, info):
+        url = feed['link']
+        if info.get('error'):
+            self._failures[url] = self._failures.get(url, 0) + 1
+        else:
+            self._failures.pop(url, None)
+        
+        median_gap = info.get('median_gap')
+        newest_age = info.get('newest_age')
+        if newest_age is None:
+            interval = self.default_interval
+        elif median_gap is None:
+            interval = max(self.default_interval, newest_age / 4)
+        else:
+            # Опрашиваем вдвое чаще обычного промежутка между публикациями
+            interval = median_gap / 2
+            # Лента замолчала дольше обычного: чем дольше молчит, тем реже спрашиваем
+            if newest_age > 2 * median_gap:
+                interval = max(interval, newest_age / 4)
+        
+        # Чаще, чем разрешает <ttl> или Cache-Control, не спрашиваем
+        if info.get('refresh_hint'):
+            interval = max(interval, info['refresh_hint'])
+        
+        # Экспоненциальная задержка после ошибок подряд
+        interval *= 2 ** min(self._failures.get(url, 0), 10)
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def schedule(self, feed, info):
+        due = time.monotonic() + self.interval_for(feed, info)
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, feed))
+
+    def next_delay(self):
+        """Секунд до ближайшего опроса или None, если очередь пуста"""
+        if not self._heap:
+            return None
+        return max(0, self._heap[0][0] - time.monotonic())
+
+    def pop_due(self):
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+# Итерация 18: Изменение размера терминала отмечается флагом, а применяется в главном потоке
+resize_pending = threading.Event()
+
+def apply_pending_resize():
+    """Подгоняет curses под новый размер терминала; True, если размер менялся"""
+    if not resize_pending.is_set():
+        return False
+    resize_pending.clear()
+    size = os.get_terminal_size(sys.stdin.fileno())
+    curses.resizeterm(size.lines, size.columns)
+    return True
+
+def read_key(stdscr):
+    """getch для вложенных экранов: после изменения размера возвращает KEY_RESIZE"""
+    key = stdscr.getch()
+    if apply_pending_resize() and key == -1:
+        return curses.KEY_RESIZE
+    return key
+
+# Итерация 18: Главный цикл событий: клавиатура, фоновые потоки и таймеры
+class EventLoop:
+    """Ждет в select, пока не придет клавиша, событие из потока или не наступит таймер"""
+
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+        self._events = queue.Queue()
+        self._timers = {}  # имя -> (время срабатывания, период или None для разового)
+        
+        # Фоновые потоки будят select записью байта в канал
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(sys.stdin.fileno(), selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        
+        if hasattr(signal, 'SIGWINCH'):
+            signal.signal(signal.SIGWINCH, self._on_resize)
+
+    def _on_resize(self, signum, frame):
+        resize_pending.set()
+        self.post('resize')
+
+    def post(self, *event):
+        """Потокобезопасно добавляет событие в очередь"""
+        self._events.put(event)
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            # Канал уже полон, главный поток и так проснется
+            pass
+
+    def set_timer(self, name, delay, interval=None):
+        """Заводит таймер заново; без interval он сработает один раз"""
+        self._timers[name] = (time.monotonic() + delay, interval)
+
+    def cancel_timer(self, name):
+        self._timers.pop(name, None)
+
+    def _read_keys(self):
+        events = []
+        self.stdscr.nodelay(True)
+        try:
+            while True:
+                key = self.stdscr.getch()
+                if key == -1:
+                    break
+                events.append(('key', key))
+        finally:
+            self.stdscr.nodelay(False)
+        return events
+
+    def _drain(self):
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _due_timers(self):
+        events = []
+        now = time.monotonic()
+        for name, (due, interval) in list(self._timers.items()):
+            if due <= now:
+                events.append(('timer', name))
+                if interval is None:
+                    del self._timers[name]
+                else:
+                    self._timers[name] = (now + interval, interval)
+        return events
+
+    def wait(self):
+        """Блокируется до первого события и возвращает все накопившиеся"""
+        while True:
+            # curses мог уже прочитать клавиши в свой буфер, поэтому сначала спрашиваем его
+            events = self._drain() + self._read_keys() + self._due_timers()
+            if events:
+                if apply_pending_resize():
+                    events.append(('resize',))
+                return events
+            
+            timeout = None
+            if self._timers:
+                next_due = min(due for due, _ in self._timers.values())
+                timeout = max(0, next_due - time.monotonic())
+            for key, _ in self._selector.select(timeout):
+                if key.fd == self._wake_r:
+                    try:
+                        while os.read(self._wake_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+
+    def close(self):
+        if hasattr(signal, 'SIGWINCH'):
+            signal.signal(signal.SIGWINCH, signal.SIG_DFL)
+        self._selector.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+# Итерация 16: Потоковое преобразование HTML описания в абзацы текста
+class HTMLTextExtractor(HTMLParser):
+    """Собирает текст по абзацам; сущности вроде &amp; и &nbsp; раскрывает сам парсер"""
+
+    BLOCK_TAGS = {
+        'p', 'div', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+        'ul', 'ol', 'table', 'tr', 'blockquote', 'pre', 'section', 'article', 'figure',
+    }
+    SKIP_TAGS = {'script', 'style', 'head'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []
+        self._parts = []
+        self._prefix = ""
+        self._skip_depth = 0
+
+    def _flush(self):
+        # Пробелы внутри абзаца схлопываются, пустые абзацы отбрасываются
+        text = " ".join("".join(self._parts).split())
+        if text:
+            self.paragraphs.append(self._prefix + text)
+        self._parts = []
+        self._prefix = ""
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == 'li':
+            self._flush()
+            self._prefix = "• "
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == 'li' or tag in self.BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        # Как и раньше, перевод строки в тексте начинает новый абзац
+        lines = data.split('\n')
+        self._parts.append(lines[0])
+        for line in lines[1:]:
+            self._flush()
+            self._parts.append(line)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+def html_to_paragraphs(html):
+    parser = HTMLTextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.paragraphs
+
+# Итерация 16: Абзацы переносятся под ширину экрана, между ними пустая строка
+def wrap_paragraphs(paragraphs, width):
+    wrapped_lines = []
+    for paragraph in paragraphs:
+        wrapped_lines.extend(textwrap.wrap(paragraph, width=width))
+        wrapped_lines.append("")
+    return wrapped_lines
+
+# Итерация 16: Готовый текст статей, чтобы повторное открытие ничего не стоило
+class ArticleTextCache:
+    """LRU: абзацы по id статьи и перенесенные строки по (id, ширина)"""
+
+    def __init__(self, size=ARTICLE_CACHE_SIZE):
+        self.size = size
+        self._paragraphs = OrderedDict()
+        self._lines = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.size:
+            cache.popitem(last=False)
+
+    def paragraphs(self, article):
+        news_id = article.get("id", article.get("link", article.get("title", "")))
+        with self._lock:
+            paragraphs = self._paragraphs.get(news_id)
+            if paragraphs is not None:
+                self._paragraphs.move_to_end(news_id)
+                return paragraphs
+        
+        paragraphs = html_to_paragraphs(article.get('description') or 'Нет описания')
+        with self._lock:
+            self._remember(self._paragraphs, news_id, paragraphs)
+        return paragraphs
+
+    def lines(self, article, width):
+        key = (article.get("id", article.get("link", article.get("title", ""))), width)
+        with self._lock:
+            lines = self._lines.get(key)
+            if lines is not None:
+                self._lines.move_to_end(key)
+                return lines
+        
+        lines = wrap_paragraphs(self.paragraphs(article), width)
+        with self._lock:
+            self._remember(self._lines, key, lines)
+        return lines
+
+article_text_cache = ArticleTextCache()
+
+# Итерация 17: Фоновая подготовка текста статей, пока пользователь листает список
+class ArticlePrerenderer:
+    """Поток, заранее переводящий выбранную статью и соседние в строки под ширину экрана"""
+
+    def __init__(self, cache=article_text_cache):
+        self.cache = cache
+        self._pending = []  # (статья, ширина); новый запрос заменяет невыполненный старый
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def request(self, articles, width):
+        with self._cond:
+            self._pending = [(article, width) for article in articles]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                article, width = self._pending.pop(0)
+            try:
+                self.cache.lines(article, width)
+            except Exception:
+                # Сломанная статья покажет ошибку при открытии, поток продолжает работу
+                pass
+
+article_prerenderer = ArticlePrerenderer()
+
+# Итерация 21: Полнотекстовый поиск по всем загруженным статьям
+class SearchIndex:
+    """SQLite FTS5 по заголовкам и очищенному тексту статей, пополняется при загрузке лент"""
+
+    def __init__(self, path=SEARCH_INDEX_FILE):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._expired_at = None  # Первая чистка - при первой возможности
+        with self._lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS articles (
+                        id INTEGER PRIMARY KEY,
+                        feed TEXT NOT NULL,
+                        news_id TEXT NOT NULL,
+                        title TEXT NOT NULL,
+                        body TEXT NOT NULL,
+                        published INTEGER,
+                        entry TEXT NOT NULL,
+                        indexed_at INTEGER,
+                        UNIQUE (feed, news_id))''')
+            # Итерация 21: Время индексации - возраст записи, у которой нет даты публикации
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(articles)")]
+            if 'indexed_at' not in columns:
+                self.conn.execute("ALTER TABLE articles ADD COLUMN indexed_at INTEGER")
+                self.conn.execute("UPDATE articles SET indexed_at = ?", (int(time.time()),))
+            self.conn.execute("DROP INDEX IF EXISTS articles_published")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS articles_age ON articles(coalesce(published, indexed_at))")
+            self.conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                        title, body, content='articles', content_rowid='id',
+                        tokenize='unicode61 remove_diacritics 2')''')
+            # Триггеры держат FTS в согласии с таблицей статей
+            self.conn.execute('''CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                        INSERT INTO articles_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+                        END''')
+            self.conn.execute('''CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                        INSERT INTO articles_fts(articles_fts, rowid, title, body)
+                        VALUES ('delete', old.id, old.title, old.body);
+                        END''')
+
+    def add_entries(self, feed_url, entries):
+        """Индексирует только записи, которых еще нет; текст очищается один раз"""
+        with self._lock:
+            known = {row[0] for row in self.conn.execute(
+                "SELECT news_id FROM articles WHERE feed = ?", (feed_url,))}
+        new_entries = [entry for entry in entries if entry['id'] not in known]
+        if not new_entries:
+            return 0
+        
+        rows = []
+        indexed_at = int(time.time())
+        for entry in new_entries:
+            published = entry['published_parsed']
+            rows.append((
+                feed_url, entry['id'], entry['title'],
+                "\n".join(html_to_paragraphs(entry.get('description') or "")),
+                calendar.timegm(published[:6]) if published else None,
+                json.dumps(entry, ensure_ascii=False),
+                indexed_at,
+            ))
+        with self._lock, self.conn:
+            self.conn.executemany('''INSERT OR IGNORE INTO articles
+                        (feed, news_id, title, body, published, entry, indexed_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)''', rows)
+        return len(rows)
+
+    def expire(self, days=SEARCH_RETENTION_DAYS):
+        cutoff = time.time() - days * 86400
+        with self._lock, self.conn:
+            # Записи без даты публикации стареют от момента индексации
+            self.conn.execute("DELETE FROM articles WHERE coalesce(published, indexed_at) < ?", (cutoff,))
+            self._expired_at = time.monotonic()
+
+    def expire_due(self, interval=SEARCH_EXPIRE_INTERVAL):
+        """Чистит индекс, если с прошлой чистки прошло больше interval секунд"""
+        if self._expired_at is None or time.monotonic() - self._expired_at >= interval:
+            self.expire()
+
+    @staticmethod
+    def _match_query(query):
+        # Каждое слово ищется как префикс; кавычки не дают пользователю сломать синтаксис FTS
+        words = query.split()
+        return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+    def search(self, query, limit=SEARCH_RESULTS_LIMIT):
+        """Список (лента, запись, время публикации) от самых релевантных"""
+        match = self._match_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self.conn.execute('''SELECT a.feed, a.entry, a.published
+                        FROM articles_fts
+                        JOIN articles a ON a.id = articles_fts.rowid
+                        WHERE articles_fts MATCH ?
+                        ORDER BY bm25(articles_fts, 5.0, 1.0)
+                        LIMIT ?''', (match, limit)).fetchall()
+        return [(feed_url, json.loads(entry), published) for feed_url, entry, published in rows]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
 
 # Итерация 5: Функция для отображения полного текста новости с пометкой прочитанной
 def show_article(stdscr, article, feed_url, read_news):
     # Итерация 5: Помечаем новость как прочитанную
     news_id = article.get("id", article.get("link", article.get("title", "")))
     mark_as_read(read_news, feed_url, news_id)
-    save_read_news(read_news)
     
     stdscr.clear()
     rows, cols = stdscr.getmaxyx()
@@ -125,25 +1793,8 @@ def show_article(stdscr, article, feed_url, read_news):
         status_x = min(cols - len(read_status) - 1, len(last_line) + 2)
         stdscr.addstr(title_height - 1, status_x, read_status, curses.A_REVERSE | curses.A_BOLD)
     
-    # Получение и подготовка описания
-    description = article.get('description', 'Нет описания')
-    
-    clean_description = ""
-    inside_tag = False
-    for char in description:
-        if char == '<':
-            inside_tag = True
-        elif char == '>':
-            inside_tag = False
-        elif not inside_tag:
-            clean_description += char
-    
-    wrapped_lines = []
-    for paragraph in clean_description.split('\n'):
-        if paragraph.strip():
-            wrapped = textwrap.wrap(paragraph, width=cols-1)
-            wrapped_lines.extend(wrapped)
-            wrapped_lines.append("")
+    # Итерация 16: Текст статьи разбирается один раз и берется из кэша
+    wrapped_lines = article_text_cache.lines(article, cols-1)
     
     current_line = title_height + 1  # Начинаем после заголовка и линии
     start_idx = 0
@@ -177,7 +1828,7 @@ def show_article(stdscr, article, feed_url, read_news):
         
         stdscr.refresh()
         
-        key = stdscr.getch()
+        key = read_key(stdscr)
         
         if key == curses.KEY_UP:
             start_idx = max(0, start_idx - 1)
@@ -191,166 +1842,680 @@ def show_article(stdscr, article, feed_url, read_news):
         elif key == ord('q') or key == ord('Q'):
             break
 
-# Итерация 5: Функция для отображения новостей с цветами прочитанных
-def show_news(stdscr, feed, read_news):
-    # Загрузка и парсинг RSS-ленты
-    try:
-        d = feedparser.parse(feed['link'])
-    except Exception as e:
-        stdscr.clear()
-        stdscr.addstr(0, 0, f"Ошибка загрузки: {e}")
-        stdscr.addstr(2, 0, "Нажмите любую клавишу для возврата...")
-        stdscr.refresh()
-        stdscr.getch()
-        return []
+# Итерация 15: Список новостей с кэшем переносов и перерисовкой только изменившихся строк
+class NewsListView:
+    """Виртуализированный список новостей для show_news"""
 
-    # Фильтрация новостей: только сегодняшние
-    today_start = datetime.now(timezone.utc).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
-    news_items = []
-    
-    for entry in d.entries:
-        if not hasattr(entry, 'published_parsed'):
-            continue
-            
-        pub_time = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
-        
-        if pub_time >= today_start:
-            time_str = pub_time.astimezone().strftime("%H:%M")
-            news_id = entry.get("id", entry.get("link", entry.title))
-            is_read = is_news_read(read_news, feed['link'], news_id)
-            
-            news_items.append({
-                'title': entry.title,
-                'time': time_str,
-                'published': pub_time,
-                'entry': entry,
-                'is_read': is_read,  # Итерация 5: Флаг прочитанной новости
-                'id': news_id
-            })
+    HINT = "Стрелки: навигация | Enter: читать | Q: назад"
+    FIRST_ROW = 3  # Список начинается с этой строки экрана
 
-    news_items.sort(key=lambda x: x['published'], reverse=True)
-    
-    current_selection = 0
-    start_idx = 0
-    
-    while True:
-        stdscr.clear()
-        rows, cols = stdscr.getmaxyx()
-        
-        title = f"Новости {feed['name']} ({len(news_items)} сегодня)"
-        stdscr.addstr(0, 0, title, curses.A_BOLD)
-        stdscr.addstr(1, 0, "Стрелки: навигация | Enter: читать | Q: назад", curses.A_DIM)
-        
-        # Отображение списка новостей с переносом текста
-        visible_items = min(rows - 4, len(news_items))
-        display_pos = 3  # Начинаем с этой строки
-        visible_count = 0
-        display_map = []  # Для сопоставления позиции экрана с индексом новости
-        
-        # Отображаем столько новостей, сколько помещается на экране
-        idx = start_idx
-        while visible_count < visible_items and idx < len(news_items):
-            item = news_items[idx]
+    def __init__(self, items, title):
+        self.items = items
+        self.title = title
+        self.selection = 0
+        self.start_idx = 0
+        self.visible_count = 0
+        self._size = None
+        self._wrap_cache = {}  # индекс новости -> готовые строки для текущей ширины
+        self._drawn = {}       # строка экрана -> (текст, атрибут), уже выведенные на экран
+
+    def invalidate(self):
+        """Экран был занят другим окном: следующая отрисовка выведет все заново"""
+        self._drawn = {}
+
+    def _item_lines(self, idx, cols):
+        lines = self._wrap_cache.get(idx)
+        if lines is None:
+            item = self.items[idx]
             prefix = f"[{item['time']}] "
-            text = item['title']
             
             # Разбиваем текст на строки с переносом
             available_width = cols - len(prefix) - 1
             if available_width < 5:  # Минимальная ширина для текста
                 available_width = 5
-                
-            wrapped_lines = textwrap.wrap(text, width=available_width)
-            if not wrapped_lines:
-                wrapped_lines = [""]
+            wrapped_lines = textwrap.wrap(item['title'], width=available_width) or [""]
             
-            # Проверяем, поместится ли новость на экран
-            required_lines = len(wrapped_lines)
-            if display_pos + required_lines > rows - 1:  # Оставляем место для статусной строки
+            # Первая строка с временем, остальные с отступом
+            indent = ' ' * len(prefix)
+            lines = [(prefix + wrapped_lines[0])[:cols-1]]
+            lines.extend((indent + text)[:cols-1] for text in wrapped_lines[1:])
+            self._wrap_cache[idx] = lines
+        return lines
+
+    def _layout(self, rows, cols):
+        screen = {
+            0: (self.title[:cols-1], curses.A_BOLD),
+            1: (self.HINT[:cols-1], curses.A_DIM),
+        }
+        
+        display_pos = self.FIRST_ROW
+        visible_count = 0
+        idx = self.start_idx
+        while idx < len(self.items):
+            lines = self._item_lines(idx, cols)
+            # Оставляем место для статусной строки
+            if display_pos + len(lines) > rows - 1:
                 break
             
-            # Отображаем первую строку с временем
-            is_selected = (idx == current_selection)
-            attr = curses.A_REVERSE if is_selected else curses.A_NORMAL
-            if item['is_read']:
+            attr = curses.A_REVERSE if idx == self.selection else curses.A_NORMAL
+            if self.items[idx]['is_read']:
                 attr |= curses.A_DIM
-                
-            line = prefix + wrapped_lines[0]
-            if len(line) > cols - 1:
-                line = line[:cols-1]
-            stdscr.addstr(display_pos, 0, line, attr)
-            display_map.append(idx)  # Запоминаем индекс новости для этой позиции
-            display_pos += 1
-            
-            # Отображаем остальные строки с отступом
-            indent = ' ' * len(prefix)
-            for line_text in wrapped_lines[1:]:
-                line = indent + line_text
-                if len(line) > cols - 1:
-                    line = line[:cols-1]
-                    
-                stdscr.addstr(display_pos, 0, line, attr)
+            for line in lines:
+                screen[display_pos] = (line, attr)
                 display_pos += 1
             
             visible_count += 1
             idx += 1
+        self.visible_count = visible_count
         
         # Отображение информации о прокрутке
-        if start_idx + visible_count < len(news_items) or start_idx > 0:
-            scroll_info = f"↑↓ {start_idx+1}-{start_idx+visible_count} из {len(news_items)}"
-            if len(scroll_info) > cols:
+        if self.start_idx + visible_count < len(self.items) or self.start_idx > 0:
+            scroll_info = f"↑↓ {self.start_idx+1}-{self.start_idx+visible_count} из {len(self.items)}"
+            if len(scroll_info) > cols - 1:
                 scroll_info = scroll_info[:cols-4] + "..."
-            stdscr.addstr(rows-1, 0, scroll_info, curses.A_REVERSE)
+            screen[rows-1] = (scroll_info, curses.A_REVERSE)
+        return screen
+
+    def draw(self, stdscr):
+        rows, cols = stdscr.getmaxyx()
+        if (rows, cols) != self._size:
+            # Размер окна изменился: переносы пересчитываются для новой ширины
+            if self._size is None or self._size[1] != cols:
+                self._wrap_cache.clear()
+            self._size = (rows, cols)
+            self._drawn = {}
+        if not self._drawn:
+            stdscr.erase()
         
-        stdscr.refresh()
+        screen = self._layout(rows, cols)
+        for y in self._drawn.keys() - screen.keys():
+            stdscr.move(y, 0)
+            stdscr.clrtoeol()
+        for y, (text, attr) in screen.items():
+            if self._drawn.get(y) != (text, attr):
+                stdscr.move(y, 0)
+                stdscr.clrtoeol()
+                stdscr.addstr(y, 0, text, attr)
+        self._drawn = screen
         
-        key = stdscr.getch()
+        stdscr.noutrefresh()
+        curses.doupdate()
+
+    def move_up(self):
+        if self.selection > 0:
+            self.selection -= 1
+            # Прокручиваем список, если текущий элемент не виден
+            if self.selection < self.start_idx:
+                self.start_idx = self.selection
+
+    def move_down(self):
+        if self.selection < len(self.items) - 1:
+            self.selection += 1
+            # Прокручиваем список, если текущий элемент не виден
+            if self.selection >= self.start_idx + self.visible_count:
+                self.start_idx += 1
+
+    def page_up(self):
+        self.selection = max(0, self.selection - self.visible_count)
+        self.start_idx = max(0, self.start_idx - self.visible_count)
+
+    def page_down(self):
+        self.selection = min(len(self.items)-1, self.selection + self.visible_count)
+        self.start_idx = max(0, min(len(self.items)-self.visible_count, self.start_idx + self.visible_count))
+
+# Итерация 21: Навигация по списку новостей, общая для ленты и результатов поиска
+def browse_news_list(stdscr, view, read_news):
+    news_items = view.items
+    
+    while True:
+        view.draw(stdscr)
+        
+        # Итерация 17: Готовим выбранную статью и соседние, пока список на экране
+        if news_items:
+            nearby = range(max(0, view.selection - PRERENDER_NEIGHBORS),
+                           min(len(news_items), view.selection + PRERENDER_NEIGHBORS + 1))
+            # Выбранная статья идет первой, остальные по удалению от нее
+            order = sorted(nearby, key=lambda idx: abs(idx - view.selection))
+            article_prerenderer.request([news_items[idx]['entry'] for idx in order],
+                                        stdscr.getmaxyx()[1] - 1)
+        
+        key = read_key(stdscr)
         
         if key == curses.KEY_UP:
-            if current_selection > 0:
-                current_selection -= 1
-                # Прокручиваем список, если текущий элемент не виден
-                if current_selection < start_idx:
-                    start_idx = current_selection
+            view.move_up()
         elif key == curses.KEY_DOWN:
-            if current_selection < len(news_items) - 1:
-                current_selection += 1
-                # Прокручиваем список, если текущий элемент не виден
-                if current_selection >= start_idx + visible_count:
-                    start_idx += 1
+            view.move_down()
         elif key == curses.KEY_PPAGE:
-            current_selection = max(0, current_selection - visible_count)
-            start_idx = max(0, start_idx - visible_count)
+            view.page_up()
         elif key == curses.KEY_NPAGE:
-            current_selection = min(len(news_items)-1, current_selection + visible_count)
-            start_idx = min(len(news_items)-visible_count, start_idx + visible_count)
+            view.page_down()
         elif key == ord('q') or key == ord('Q'):
             break
-        elif key == curses.KEY_ENTER or key in [10, 13]:
-            selected = news_items[current_selection]
+        elif (key == curses.KEY_ENTER or key in [10, 13]) and news_items:
+            selected = news_items[view.selection]
             # Итерация 5: Передаем данные о прочитанных новостях
-            show_article(stdscr, selected['entry'], feed['link'], read_news)
+            show_article(stdscr, selected['entry'], selected['feed'], read_news)
             # Итерация 5: Обновляем статус прочтения после просмотра
             selected['is_read'] = True
+            view.invalidate()
+
+# Итерация 5: Функция для отображения новостей с цветами прочитанных
+def show_news(stdscr, feed, read_news):
+    # Итерация 11: Записи берутся из общего хранилища, сеть нужна только если лента устарела
+    # Сегодняшние записи показываются сразу, даже старше TTL: ленты обновляет
+    # планировщик, а открытие ленты не должно ждать сеть
+    try:
+        feed_items = feed_store.cached(feed['link'])
+        if feed_items is None:
+            feed_items = feed_store.get(feed['link'])
+    except Exception as e:
+        stdscr.clear()
+        stdscr.addstr(0, 0, f"Ошибка загрузки: {e}")
+        stdscr.addstr(2, 0, "Нажмите любую клавишу для возврата...")
+        stdscr.refresh()
+        stdscr.getch()
+        return []
+
+    # Итерация 5: Флаг прочитанной новости добавляется к копии записи
+    news_items = [
+        dict(item, is_read=is_news_read(read_news, feed['link'], item['id']), feed=feed['link'])
+        for item in feed_items
+    ]
+    
+    # Итерация 15: Отрисовкой и прокруткой занимается NewsListView
+    view = NewsListView(news_items, f"Новости {feed['name']} ({len(news_items)} сегодня)")
+    browse_news_list(stdscr, view, read_news)
     
     return news_items
 
+# Итерация 23: Общая лента: слияние уже отсортированных списков лент по мере прокрутки
+class MergedTimeline:
+    """Последовательность для NewsListView; записи вынимаются из heapq.merge только при обращении"""
+
+    def __init__(self, feed_items, read_news):
+        """feed_items - пары (лента, ее записи от новых к старым)"""
+        self._total = sum(len(items) for _, items in feed_items)
+        streams = [self._stream(feed, items, read_news) for feed, items in feed_items]
+        self._merged = heapq.merge(*streams, key=lambda item: item['published'], reverse=True)
+        self.loaded = []
+
+    @staticmethod
+    def _stream(feed, items, read_news):
+        # Копия записи и проверка прочтения - только когда запись дошла до экрана
+        for item in items:
+            yield dict(item,
+                       title=f"{feed['name']}: {item['title']}",
+                       is_read=is_news_read(read_news, feed['link'], item['id']),
+                       feed=feed['link'])
+
+    def __len__(self):
+        return self._total
+
+    def __getitem__(self, idx):
+        while idx >= len(self.loaded):
+            self.loaded.append(next(self._merged))
+        return self.loaded[idx]
+
+def show_timeline(stdscr, feeds, read_news, fetcher=None):
+    # Ленты, уже лежащие в хранилище, берутся как есть, даже если их пора обновить:
+    # обновлением занимается планировщик, экран не должен ждать сеть
+    loaded = {}
+    missing = []
+    for feed in feeds:
+        items = feed_store.cached(feed['link'])
+        if items is None:
+            missing.append(feed)
+        else:
+            loaded[feed['link']] = items
+    
+    if missing:
+        results = {}
+        finished = []
+        def done(feed, items, error):
+            # Недоступная лента просто не попадает в общую
+            if error is None:
+                results[feed['link']] = items
+            finished.append(feed['link'])
+        
+        if fetcher:
+            for feed in missing:
+                fetcher.submit(feed, lambda f: feed_store.get(f['link']), done)
+        else:
+            # Без своего пула (данные у демона) ленты запрашиваются по очереди в фоне
+            def load_all():
+                for feed in missing:
+                    try:
+                        done(feed, feed_store.get(feed['link']), None)
+                    except Exception as e:
+                        done(feed, None, e)
+            threading.Thread(target=load_all, daemon=True).start()
+        
+        # Пока ленты грузятся, показываем ход загрузки; Esc или q - показать то, что уже есть
+        stdscr.timeout(100)
+        try:
+            while len(finished) < len(missing):
+                rows, cols = stdscr.getmaxyx()
+                stdscr.clear()
+                stdscr.addstr(0, 0, f"Загрузка лент: {len(finished)} из {len(missing)}"[:cols-1], curses.A_BOLD)
+                stdscr.addstr(rows - 1, 0, "Esc/q - показать загруженные"[:cols-1])
+                stdscr.refresh()
+                if stdscr.getch() in (27, ord('q'), ord('Q')):
+                    break
+        finally:
+            stdscr.timeout(-1)
+        loaded.update(dict(results))
+    
+    feed_items = [(feed, loaded[feed['link']]) for feed in feeds if feed['link'] in loaded]
+    timeline = MergedTimeline(feed_items, read_news)
+    view = NewsListView(timeline, f"Все ленты ({len(timeline)} сегодня)")
+    browse_news_list(stdscr, view, read_news)
+    
+    return timeline.loaded
+
+# Итерация 21: Строка ввода внизу экрана, с поддержкой кириллицы
+def prompt_input(stdscr, prompt):
+    """Возвращает введенный текст или None, если ввод отменен клавишей Esc"""
+    text = ""
+    curses.curs_set(1)
+    try:
+        while True:
+            rows, cols = stdscr.getmaxyx()
+            stdscr.move(rows - 1, 0)
+            stdscr.clrtoeol()
+            stdscr.addstr(rows - 1, 0, (prompt + text)[-(cols - 1):])
+            stdscr.refresh()
+            
+            ch = stdscr.get_wch()
+            if ch in ('\n', '\r') or ch == curses.KEY_ENTER:
+                return text.strip()
+            if ch == '\x1b':
+                return None
+            if ch in (curses.KEY_BACKSPACE, '\x7f', '\b'):
+                text = text[:-1]
+            elif isinstance(ch, str) and ch.isprintable():
+                text += ch
+    finally:
+        curses.curs_set(0)
+
+# Итерация 21: Экран поиска по всем подпискам
+def show_search(stdscr, feeds, read_news, search):
+    """search(запрос) возвращает список (лента, запись, время публикации)"""
+    query = prompt_input(stdscr, "Поиск: ")
+    if not query:
+        return []
+    
+    started = time.perf_counter()
+    try:
+        results = search(query)
+    except Exception as e:
+        stdscr.clear()
+        stdscr.addstr(0, 0, f"Ошибка поиска: {e}")
+        stdscr.addstr(2, 0, "Нажмите любую клавишу для возврата...")
+        stdscr.refresh()
+        stdscr.getch()
+        return []
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    
+    names = {feed['link']: feed['name'] for feed in feeds}
+    news_items = []
+    for feed_url, entry, published in results:
+        pub_time = datetime.fromtimestamp(published, timezone.utc) if published else None
+        news_items.append({
+            'title': f"{names.get(feed_url, feed_url)}: {entry['title']}",
+            'time': pub_time.astimezone().strftime("%d.%m %H:%M") if pub_time else "--.-- --:--",
+            'published': pub_time,
+            'entry': entry,
+            'id': entry['id'],
+            'feed': feed_url,
+            'is_read': is_news_read(read_news, feed_url, entry['id']),
+        })
+    
+    view = NewsListView(news_items, f"Поиск «{query}»: {len(news_items)} за {elapsed_ms:.0f} мс")
+    browse_news_list(stdscr, view, read_news)
+    
+    return news_items
+
+# Итерация 25: Экран замеров загрузки лент, медленные сверху
+def show_stats(stdscr, feeds, get_stats):
+    """get_stats() возвращает список замеров из FeedStats"""
+    names = {feed['link']: feed['name'] for feed in feeds}
+    start_idx = 0
+    message = ""
+    
+    while True:
+        stats = sorted(get_stats(), key=lambda metrics: metrics['total'], reverse=True)
+        rows, cols = stdscr.getmaxyx()
+        stdscr.erase()
+        stdscr.addstr(0, 0, f"Загрузка лент ({len(stats)}), время в мс"[:cols-1], curses.A_BOLD)
+        stdscr.addstr(1, 0, "Стрелки: прокрутка | E: выгрузить в JSON | Q: назад"[:cols-1], curses.A_DIM)
+        header = (f"{'Лента':<18} {'DNS':>5} {'Связь':>5} {'Прием':>6} {'Разбор':>6} "
+                  f"{'КБ':>6} {'Зап.':>4} {'Кэш':<5} Ошибка")
+        stdscr.addstr(2, 0, header[:cols-1], curses.A_UNDERLINE)
+        
+        for y, metrics in enumerate(stats[start_idx:], start=3):
+            if y >= rows - 1:
+                break
+            line = (f"{names.get(metrics['url'], metrics['url'])[:18]:<18} "
+                    f"{metrics['dns'] * 1000:5.0f} {metrics['connect'] * 1000:5.0f} "
+                    f"{metrics['transfer'] * 1000:6.0f} {metrics['parse'] * 1000:6.0f} "
+                    f"{metrics['bytes'] / 1024:6.1f} {metrics['entries']:4d} "
+                    f"{metrics['cache']:<5} {metrics['error'] or ''}")
+            attr = curses.A_BOLD if metrics['error'] else curses.A_NORMAL
+            stdscr.addstr(y, 0, line[:cols-1], attr)
+        
+        if message:
+            stdscr.addstr(rows - 1, 0, message[:cols-1], curses.A_REVERSE)
+            message = ""
+        stdscr.refresh()
+        
+        key = read_key(stdscr)
+        if key == curses.KEY_UP:
+            start_idx = max(0, start_idx - 1)
+        elif key == curses.KEY_DOWN:
+            start_idx = min(max(0, len(stats) - 1), start_idx + 1)
+        elif key in (ord('e'), ord('E')):
+            try:
+                message = f"Замеры дописаны в {export_feed_stats(stats)}"
+            except OSError as e:
+                message = f"Ошибка выгрузки: {e}"
+        elif key == ord('q') or key == ord('Q'):
+            break
+
+# Итерация 20: Загрузка подписок, общая для интерфейса и демона
+def load_subscriptions():
+    # Итерация 8: Обновленный путь
+    subscription_path = os.path.join(BASE_DIR, 'subscriptions.json')
+    with open(subscription_path, 'r') as f:
+        return json.load(f)
+
+# Итерация 20: Исходящая сторона соединения с клиентом демона
+class DaemonConnection:
+    """Строки ответа пишутся целиком под блокировкой соединения: ответы обработчика
+    и рассылка из потоков загрузки не перемешиваются"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.lock = threading.RLock()
+
+    def send(self, message):
+        line = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+        with self.lock:
+            self.wfile.write(line)
+            self.wfile.flush()
+
+# Итерация 20: Демон: загрузка, кэш и состояние прочтения без интерфейса
+class RSSDaemon:
+    """Опрашивает ленты по расписанию и отвечает клиентам через Unix-сокет"""
+
+    def __init__(self, feeds, socket_path=RSS_SOCKET_PATH):
+        self.feeds = feeds
+        self.feeds_by_link = {feed['link']: feed for feed in feeds}
+        self.socket_path = socket_path
+        self.read_news = load_read_news()
+        self.fetcher = FeedFetcher()
+        self.scheduler = RefreshScheduler()
+        self.counts = {}        # имя ленты -> непрочитано
+        self.watchers = set()   # открытые подписки на изменения счетчиков
+        self._cond = threading.Condition()
+        # Итерация 21: Индекс пополняется при каждой загрузке ленты
+        self.search_index = SearchIndex()
+        feed_store.index = self.search_index
+
+    def _set_count(self, feed, count):
+        with self._cond:
+            changed = self.counts.get(feed['name']) != count
+            self.counts[feed['name']] = count
+            watchers = list(self.watchers) if changed else []
+        if changed:
+            self._broadcast(watchers, {feed['name']: count})
+
+    def _broadcast(self, watchers, counts):
+        for conn in watchers:
+            try:
+                conn.send({"ok": True, "counts": counts})
+            except OSError:
+                with self._cond:
+                    self.watchers.discard(conn)
+
+    def _on_count(self, feed, count):
+        self._set_count(feed, count)
+        with self._cond:
+            self.scheduler.schedule(feed, feed_store.info(feed['link']))
+            self._cond.notify()
+
+    def handle(self, request, conn):
+        """Выполняет одну команду клиента и возвращает ответ; None - ответ уже отправлен"""
+        cmd = request.get("cmd")
+        if cmd == "counts":
+            with self._cond:
+                return {"ok": True, "counts": dict(self.counts)}
+        
+        if cmd == "watch":
+            # Ответ - текущие счетчики, дальше в это соединение идут только изменения.
+            # Снимок отправляется под блокировкой соединения: рассылка изменений, начатая
+            # сразу после регистрации, ждет его и не может прийти раньше
+            with conn.lock:
+                with self._cond:
+                    self.watchers.add(conn)
+                    counts = dict(self.counts)
+                conn.send({"ok": True, "counts": counts})
+            return None
+        
+        if cmd == "stats":
+            return {"ok": True, "stats": feed_stats.snapshot()}
+        
+        if cmd == "search":
+            results = self.search_index.search(request.get("query", ""))
+            # Найденное может быть из лент, которые клиент еще не открывал, и о прочтении он не знает
+            read = [[feed_url, entry['id']] for feed_url, entry, _ in results
+                    if is_news_read(self.read_news, feed_url, entry['id'])]
+            return {"ok": True, "results": results, "read": read}
+        
+        feed = self.feeds_by_link.get(request.get("link"))
+        if feed is None:
+            return {"ok": False, "error": "неизвестная лента"}
+        
+        if cmd == "entries":
+            # Записи отдаются такими, какие есть: обновляет ленты планировщик, а клиент
+            # не должен ждать сеть при открытии ленты. Загрузка - только если записей нет
+            news_items = feed_store.cached(feed['link'])
+            if news_items is None:
+                news_items = feed_store.get(feed['link'])
+            entries = [item['entry'] for item in news_items]
+            read_ids = [item['id'] for item in news_items
+                        if is_news_read(self.read_news, feed['link'], item['id'])]
+            return {"ok": True, "entries": entries, "read": read_ids}
+        
+        if cmd == "mark_read":
+            mark_as_read(self.read_news, feed['link'], request["id"])
+            # mark_as_read уже уменьшил счетчики этой ленты и лент с копиями новости
+            for copy_link, _ in duplicate_index.copies(feed['link'], request["id"]):
+                copy_feed = self.feeds_by_link.get(copy_link)
+                if copy_feed is not None:
+                    self._set_count(copy_feed, get_unread_counter(copy_link).count)
+            return {"ok": True}
+        
+        return {"ok": False, "error": f"неизвестная команда {cmd!r}"}
+
+    def serve_forever(self):
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                # Подписка может молчать часами, таймаут сокета ей не нужен
+                self.request.settimeout(None)
+                conn = DaemonConnection(self.wfile)
+                try:
+                    for line in self.rfile:
+                        try:
+                            response = daemon.handle(json.loads(line), conn)
+                        except Exception as e:
+                            response = {"ok": False, "error": str(e)}
+                        if response is not None:
+                            conn.send(response)
+                finally:
+                    with daemon._cond:
+                        daemon.watchers.discard(conn)
+
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        
+        # Итерация 26: Клиенты сразу получают счетчики из снимка
+        for feed, count in preload_unread_counts(self.feeds, self.read_news):
+            self._set_count(feed, count)
+        
+        # Первая загрузка всех лент, дальше каждая по своему расписанию
+        fetch_unread_counts(self.fetcher, self.feeds, self.read_news, self._on_count)
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait(self.scheduler.next_delay())
+                    due = self.scheduler.pop_due()
+                fetch_unread_counts(self.fetcher, due, self.read_news,
+                                    self._on_count, refresh=True)
+                # Итерация 21: Демон живет неделями, старые статьи убираются по ходу работы
+                self.search_index.expire_due()
+        finally:
+            server.shutdown()
+            self.fetcher.shutdown()
+            save_read_news(self.read_news)
+            self.search_index.expire()
+            self.search_index.close()
+            http_pool.close()
+            os.remove(self.socket_path)
+
+# Итерация 20: Клиент демона: запросы и ответы строками JSON
+class DaemonClient:
+    """Соединение с демоном get_rss.py --daemon"""
+
+    def __init__(self, socket_path=RSS_SOCKET_PATH):
+        self.socket_path = socket_path
+        self._sock = self._connect(DAEMON_REQUEST_TIMEOUT)
+        self._file = self._sock.makefile('rwb')
+        self._lock = threading.Lock()
+        self._watch_sock = None
+
+    def _connect(self, timeout):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def request(self, cmd, **params):
+        line = json.dumps(dict(params, cmd=cmd), ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line.encode("utf-8"))
+            self._file.flush()
+            response = self._file.readline()
+        if not response:
+            raise ConnectionError("Демон закрыл соединение")
+        response = json.loads(response)
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", "ошибка демона"))
+        return response
+
+    def watch(self, on_counts):
+        """Отдельный поток получает от демона изменения счетчиков: on_counts({имя: число})"""
+        self._watch_sock = self._connect(None)
+        watch_file = self._watch_sock.makefile('rwb')
+        watch_file.write(b'{"cmd": "watch"}\n')
+        watch_file.flush()
+
+        def reader():
+            try:
+                for line in watch_file:
+                    on_counts(json.loads(line).get("counts", {}))
+            except (OSError, ValueError):
+                pass
+
+        threading.Thread(target=reader, daemon=True).start()
+
+    def close(self):
+        for sock in (self._sock, self._watch_sock):
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+
+def connect_daemon(socket_path=RSS_SOCKET_PATH):
+    """Клиент запущенного демона или None, если демона нет"""
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        return DaemonClient(socket_path)
+    except OSError:
+        return None
+
+# Итерация 20: Состояние прочтения, которое хранит демон
+class DaemonReadNews:
+    """Тот же интерфейс, что у ReadNewsJournal; прочитанное известно из ответов демона"""
+
+    def __init__(self, client):
+        self.client = client
+        self._read = set()
+        self._lock = threading.Lock()
+
+    def remember(self, feed_url, news_ids):
+        with self._lock:
+            self._read.update((feed_url, news_id) for news_id in news_ids)
+
+    def is_read(self, feed_url, news_id):
+        with self._lock:
+            return (feed_url, news_id) in self._read
+
+    def mark(self, feed_url, news_id):
+        self.remember(feed_url, [news_id])
+        self.client.request("mark_read", link=feed_url, id=news_id)
+
+    def expire(self):
+        pass
+
+    def close(self):
+        self.client.close()
+
+# Итерация 20: Записи лент, которые загрузил демон
+class DaemonFeedStore(FeedStore):
+    """FeedStore, который берет записи у демона вместо сети"""
+
+    def __init__(self, client, read_news, ttl=FEED_STORE_TTL):
+        super().__init__(ttl)
+        self.client = client
+        self.read_news = read_news
+
+    def get(self, url, max_age=None):
+        if max_age is None:
+            max_age = self.ttl
+        today_start = today_start_utc()
+        with self._lock:
+            cached = self._feeds.get(url)
+        if cached and cached[1] == today_start and time.time() - cached[0] < max_age:
+            return cached[2]
+        
+        response = self.client.request("entries", link=url)
+        self.read_news.remember(url, response["read"])
+        items = filter_today_entries(response["entries"], today_start)
+        with self._lock:
+            self._feeds[url] = (time.time(), today_start, items)
+        return items
+
 def main(stdscr):
     # Инициализация цветов и настроек
     curses.curs_set(0)
     curses.use_default_colors()
     stdscr.keypad(True)
     
-    # Итерация 5: Загрузка данных о прочитанных новостях
-    read_news = load_read_news()
-    
     # Загрузка RSS-подписок из JSON
     try:
-        # Итерация 8: Обновленный путь
-        subscription_path = os.path.join(BASE_DIR, 'subscriptions.json')
-        with open(subscription_path, 'r') as f:
-            feeds = json.load(f)
+        feeds = load_subscriptions()
     except FileNotFoundError:
         stdscr.addstr(0, 0, "Error: subscriptions.json not found!")
         stdscr.refresh()
@@ -359,107 +2524,216 @@ def main(stdscr):
 
     current_selection = 0
     
-    # Итерация 5: Подсчет непрочитанных новостей для каждой ленты
-    feed_unread_counts = {}
-    for feed in feeds:
-        feed_unread_counts[feed['name']] = count_unread_news(feed, read_news)
-    
-    # Итерация 6: Флаг для обновления интерфейса
-    refresh_needed = False
+    # Итерация 18: Все изменения состояния приходят событиями в главный поток
+    loop = EventLoop(stdscr)
     
-    # Итерация 6: Событие для управления фоновым потоком
-    update_event = threading.Event()
-    update_event.set()  # Разрешаем обновление
+    def post_count(feed, count):
+        loop.post('count', feed, count)
     
-    # Итерация 6: Функция для запроса обновления интерфейса
-    def request_refresh():
-        nonlocal refresh_needed
-        refresh_needed = True
-    
-    # Итерация 6: Запуск фонового потока для проверки обновлений
-    updater_thread = threading.Thread(
-        target=background_updater,
-        args=(feeds, read_news, feed_unread_counts, update_event, request_refresh),
-        daemon=True
-    )
-    updater_thread.start()
+    # Итерация 9: Счетчики заполняются по мере загрузки, список рисуется сразу
+    feed_unread_counts = {}
     
-
-    # Главный цикл приложения
-    while True:
-        # Итерация 7: Всегда очищаем экран перед отрисовкой
-        stdscr.clear()
-
-        # Итерация 6: Проверка необходимости обновления интерфейса
-        if refresh_needed:
-            refresh_needed = False
-            # Перерисовываем экран
-            stdscr.clear()
+    # Итерация 20: Если запущен демон, интерфейс только показывает его данные
+    client = connect_daemon()
+    if client:
+        global feed_store
+        read_news = DaemonReadNews(client)
+        feed_store = DaemonFeedStore(client, read_news)
+        fetcher = None
+        scheduler = None
+        search_index = None
         
-        # Отображение заголовка
-        rows, cols = stdscr.getmaxyx()
-        header = "RSS Reader - Выберите ленту (ENTER: открыть, Q: выход)"
-        stdscr.addstr(0, 0, header, curses.A_BOLD)
-        
-        # Итерация 5: Отображение списка подписок с количеством непрочитанных
-        for idx, feed in enumerate(feeds):
-            unread_count = feed_unread_counts.get(feed['name'], 0)
-            unread_info = f" - {unread_count} непрочитано" if unread_count > 0 else ""
-            feed_line = f"{feed['name']}{unread_info}"
-            
-            # Обрезаем строку если она слишком длинная
-            if len(feed_line) > cols - 4:
-                feed_line = feed_line[:cols-7] + "..."
-            
-            if idx == current_selection:
-                stdscr.addstr(idx + 2, 0, f"> {feed_line}", curses.A_REVERSE)
-            else:
-                stdscr.addstr(idx + 2, 0, f"  {feed_line}")
+        # Итерация 21: Поиск выполняет демон, у него индекс всех лент
+        def search(query):
+            response = client.request("search", query=query)
+            for feed_url, news_id in response.get("read", ()):
+                read_news.remember(feed_url, [news_id])
+            return [tuple(result) for result in response["results"]]
         
-        # Обновляем экран
-        stdscr.refresh()
+        # Итерация 25: Замеры загрузки тоже у демона
+        def get_stats():
+            return client.request("stats")["stats"]
         
-        # Итерация 6: Устанавливаем таймаут для неблокирующего чтения
-        stdscr.timeout(1000)  # Ждем ввод 1 секунду
+        feeds_by_name = {feed['name']: feed for feed in feeds}
+        def post_counts(counts):
+            for name, count in counts.items():
+                if name in feeds_by_name:
+                    post_count(feeds_by_name[name], count)
+        client.watch(post_counts)
+    else:
+        # Итерация 5: Загрузка данных о прочитанных новостях
+        read_news = load_read_news()
         
-        # Обработка пользовательского ввода
-        key = stdscr.getch()
+        # Итерация 9: Таймаут для зависших лент, чтобы не занимать пул навсегда
+        socket.setdefaulttimeout(FETCH_TIMEOUT)
+        fetcher = FeedFetcher()
         
-        # Итерация 6: Сбрасываем таймаут после получения ввода
-        stdscr.timeout(-1)
+        # Итерация 19: Каждая лента опрашивается в своем ритме
+        scheduler = RefreshScheduler()
         
-        # Выход по 'Q'
-        if key == ord('q') or key == ord('Q'):
-            # Итерация 6: Останавливаем фоновый поток
-            update_event.clear()
-            break
+        # Итерация 21: Загруженные статьи индексируются для поиска
+        search_index = SearchIndex()
+        feed_store.index = search_index
+        search = search_index.search
+        get_stats = feed_stats.snapshot
         
-        # Навигация по списку
-        elif key == curses.KEY_UP:
-            current_selection = max(0, current_selection - 1)
-        elif key == curses.KEY_DOWN:
-            current_selection = min(len(feeds) - 1, current_selection + 1)
+        # Итерация 26: Список сразу показывает данные из снимка, сеть их только обновит
+        for feed, count in preload_unread_counts(feeds, read_news):
+            feed_unread_counts[feed['name']] = count
         
-        # Обработка выбора ленты
-        elif key == curses.KEY_ENTER or key in [10, 13]:
-            # Итерация 6: Временно отключаем обновления
-            update_event.clear()
+        fetch_unread_counts(fetcher, feeds, read_news, post_count)
+    
+    # Итерация 18: Экран перерисовывается только после видимых изменений
+    redraw = True
+    running = True
+    
+    # Главный цикл приложения
+    while running:
+        if redraw:
+            redraw = False
+            stdscr.erase()
             
-            selected = feeds[current_selection]
-            show_news(stdscr, selected, read_news)
+            # Отображение заголовка
+            rows, cols = stdscr.getmaxyx()
+            header = "RSS Reader - Выберите ленту (ENTER: открыть, A: все, /: поиск, S: замеры, Q: выход)"
+            stdscr.addstr(0, 0, header[:cols-1], curses.A_BOLD)
             
-            # Итерация 5: Обновляем счетчик непрочитанных после просмотра ленты
-            feed_unread_counts[selected['name']] = count_unread_news(selected, read_news)
+            # Итерация 5: Отображение списка подписок с количеством непрочитанных
+            for idx, feed in enumerate(feeds):
+                if idx + 2 >= rows:
+                    break
+                unread_count = feed_unread_counts.get(feed['name'])
+                if unread_count is None:
+                    # Итерация 9: Лента еще загружается
+                    unread_info = " - загрузка..."
+                else:
+                    unread_info = f" - {unread_count} непрочитано" if unread_count > 0 else ""
+                # Итерация 26: Лента показана по снимку, потому что свежую загрузить не удалось;
+                # если и снимка нет, показывать нечего и пометка не нужна
+                if feed_store.info(feed['link']).get('from_snapshot'):
+                    unread_info += " (нет свежих данных)"
+                feed_line = f"{feed['name']}{unread_info}"
+                
+                # Обрезаем строку если она слишком длинная
+                if len(feed_line) > cols - 4:
+                    feed_line = feed_line[:cols-7] + "..."
+                
+                if idx == current_selection:
+                    stdscr.addstr(idx + 2, 0, f"> {feed_line}", curses.A_REVERSE)
+                else:
+                    stdscr.addstr(idx + 2, 0, f"  {feed_line}")
             
-            # Итерация 6: Включаем обновления обратно
-            update_event.set()
+            # Обновляем экран
+            stdscr.noutrefresh()
+            curses.doupdate()
         
-        # Итерация 6: Обработка таймаута (ничего не нажато)
-        elif key == -1:
-            # Ничего не делаем, просто переходим к следующей итерации
-            pass
+        # Итерация 18: Ждем событий без опроса по таймауту
+        for event in loop.wait():
+            kind = event[0]
+            
+            # Итерация 18: Счетчик ленты посчитан в пуле, применяем его здесь
+            if kind == 'count':
+                _, feed, count = event
+                if feed_unread_counts.get(feed['name']) != count:
+                    feed_unread_counts[feed['name']] = count
+                    redraw = True
+                # Итерация 19: Следующий опрос назначается по итогам этого
+                if scheduler:
+                    scheduler.schedule(feed, feed_store.info(feed['link']))
+            
+            # Итерация 6: Периодическое обновление лент
+            elif kind == 'timer' and event[1] == 'refresh':
+                # Итерация 19: Опрашиваем только ленты, чей срок подошел; до ответа их нет в очереди
+                fetch_unread_counts(fetcher, scheduler.pop_due(), read_news,
+                                    post_count, refresh=True)
+                # Итерация 21: Чистка индекса идет в пуле, не в потоке интерфейса
+                fetcher.executor.submit(search_index.expire_due)
+            
+            elif kind == 'resize':
+                redraw = True
+            
+            elif kind == 'key':
+                key = event[1]
+                
+                # Выход по 'Q'
+                if key == ord('q') or key == ord('Q'):
+                    running = False
+                    break
+                
+                # Навигация по списку
+                elif key == curses.KEY_UP:
+                    current_selection = max(0, current_selection - 1)
+                    redraw = True
+                elif key == curses.KEY_DOWN:
+                    current_selection = min(len(feeds) - 1, current_selection + 1)
+                    redraw = True
+                elif key == curses.KEY_RESIZE:
+                    redraw = True
+                
+                # Итерация 25: Какая лента тормозит или не загружается
+                elif key in (ord('s'), ord('S')):
+                    show_stats(stdscr, feeds, get_stats)
+                    redraw = True
+                
+                # Итерация 21: Поиск по всем загруженным статьям
+                # Итерация 23: Общая лента сегодняшних новостей
+                elif key in (ord('/'), ord('a'), ord('A')):
+                    if key == ord('/'):
+                        shown = show_search(stdscr, feeds, read_news, search)
+                    else:
+                        shown = show_timeline(stdscr, feeds, read_news, fetcher)
+                    # Счетчики меняются только у лент, статьи которых открывали
+                    opened = {item['feed'] for item in shown if item['is_read']}
+                    for feed in feeds:
+                        if feed['link'] in opened:
+                            feed_unread_counts[feed['name']] = count_unread_news(feed, read_news)
+                    redraw = True
+                
+                # Обработка выбора ленты
+                elif key == curses.KEY_ENTER or key in [10, 13]:
+                    selected = feeds[current_selection]
+                    show_news(stdscr, selected, read_news)
+                    
+                    # Итерация 5: Обновляем счетчик непрочитанных после просмотра ленты
+                    feed_unread_counts[selected['name']] = count_unread_news(selected, read_news)
+                    redraw = True
+        
+        # Итерация 19: Будильник на ближайший по расписанию опрос
+        delay = scheduler.next_delay() if scheduler else None
+        if delay is None:
+            loop.cancel_timer('refresh')
+        else:
+            loop.set_timer('refresh', delay)
+    
+    # Итерация 6: Останавливаем фоновые загрузки
+    loop.close()
+    if fetcher:
+        fetcher.shutdown()
+        http_pool.close()
+    if search_index:
+        search_index.expire()
+        search_index.close()
+    # Итерация 13: Закрываем журнал прочитанных при выходе
+    save_read_news(read_news)
 
 if __name__ == "__main__":
+    # Итерация 20: Режимы запуска: интерфейс, демон или запрос счетчиков у демона
+    parser = argparse.ArgumentParser(description="RSS Reader")
+    parser.add_argument("--daemon", action="store_true",
+                        help="загружать ленты в фоне и обслуживать клиентов через сокет")
+    parser.add_argument("--counts", action="store_true",
+                        help="вывести счетчики непрочитанных от демона в JSON")
+    args = parser.parse_args()
+    
+    if args.counts:
+        client = connect_daemon()
+        if client is None:
+            print("Error: get_rss.py --daemon is not running.", file=sys.stderr)
+            exit(1)
+        print(json.dumps(client.request("counts")["counts"], ensure_ascii=False))
+        client.close()
+        exit(0)
+    
     # Итерация 8: Обновление путей
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     # Проверка существования файла перед запуском
@@ -481,4 +2755,20 @@ if __name__ == "__main__":
         print("Install it with: pip install feedparser")
         exit(1)
     
+    if args.daemon:
+        # Итерация 20: Второй демон не нужен
+        client = connect_daemon()
+        if client is not None:
+            client.close()
+            print("Error: get_rss.py --daemon is already running.", file=sys.stderr)
+            exit(1)
+        socket.setdefaulttimeout(FETCH_TIMEOUT)
+        # По SIGTERM выходим через finally, чтобы убрать сокет и закрыть журнал
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            RSSDaemon(load_subscriptions()).serve_forever()
+        except KeyboardInterrupt:
+            pass
+        exit(0)
+    
     curses.wrapper(main)
@@ -67,6 +67,15 @@ nohup alacritty --class 'CONSOLE' >/dev/null 2>&1 &
 nohup alacritty --class 'BTOP' -e btop >/dev/null 2>&1 &
 nohup alacritty --class 'WEATHER' -e python ~/user_programs/weather/weather.py >/dev/null 2>&1 &
 nohup alacritty --class 'TASK' -e python ~/user_programs/task_manager/task_manager.py >/dev/null 2>&1 &
+# Демон RSS загружает ленты для интерфейса и других клиентов
+RSS_SOCKET="${XDG_RUNTIME_DIR:-$HOME/user_programs/rss}/get_rss.sock"
+rm -f "$RSS_SOCKET"
+nohup python ~/user_programs/rss/get_rss.py --daemon >/dev/null 2>&1 &
+# Интерфейс запускаем, когда демон создаст сокет (но не дольше 10 секунд)
+for _ in $(seq 100); do
+    [ -S "$RSS_SOCKET" ] && break
+    sleep 0.1
+done
 nohup alacritty --class 'RSS' -e python ~/user_programs/rss/get_rss.py >/dev/null 2>&1 &
 
 
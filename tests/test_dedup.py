@@ -0,0 +1,60 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import get_rss
+
+BOILERPLATE = ("Подробнее читайте на нашем сайте, подписывайтесь на наш канал "
+               "и следите за новостями региона каждый день вместе с редакцией")
+
+STORY = ("Правительство утвердило новый порядок расчета пособий для семей с детьми, "
+         "изменения вступят в силу с первого января и затронут несколько миллионов получателей "
+         "по всей стране, сообщили в министерстве труда")
+
+
+def entry(news_id, title, description, link):
+    return {'id': news_id, 'title': title, 'description': description, 'link': link}
+
+
+class DuplicateIndexTest(unittest.TestCase):
+    def test_boilerplate_descriptions_do_not_collapse(self):
+        index = get_rss.DuplicateIndex()
+        titles = [
+            "Открылся новый мост через реку", "В городе прошел марафон",
+            "Школы перешли на дистанционное обучение", "Цены на бензин снизились",
+            "Театр представил премьеру сезона", "Аэропорт изменил расписание рейсов",
+            "Футбольный клуб сменил тренера", "В парке высадили тысячу деревьев",
+            "Мэрия объявила конкурс проектов", "Синоптики обещают похолодание",
+        ]
+        entries = [entry(f"n{i}", title, BOILERPLATE, f"https://a.example/news/{i}")
+                   for i, title in enumerate(titles)]
+        self.assertEqual(len(index.primary_entries("a", entries)), len(entries))
+
+        # Те же подписи в другой ленте под другими заголовками тоже не склеиваются
+        others = [entry(f"m{i}", f"Другая новость номер {i} о событиях дня", BOILERPLATE,
+                        f"https://b.example/{i}") for i in range(4)]
+        self.assertEqual(len(index.primary_entries("b", others)), len(others))
+
+    def test_copy_in_another_feed_is_hidden(self):
+        index = get_rss.DuplicateIndex()
+        first = entry("1", "Правительство утвердило новый порядок расчета пособий", STORY,
+                      "https://a.example/1")
+        copy = entry("2", "Правительство утвердило новый порядок расчета пособий",
+                     STORY, "https://b.example/2")
+        self.assertEqual(index.primary_entries("a", [first]), [first])
+        self.assertEqual(index.primary_entries("b", [copy]), [])
+        self.assertEqual(sorted(index.copies("b", "2")), [("a", "1"), ("b", "2")])
+
+    def test_same_feed_entries_never_grouped(self):
+        index = get_rss.DuplicateIndex()
+        first = entry("1", "Правительство утвердило новый порядок расчета пособий", STORY,
+                      "https://a.example/same")
+        second = entry("2", "Правительство утвердило новый порядок расчета пособий", STORY,
+                       "https://a.example/same")
+        self.assertEqual(len(index.primary_entries("a", [first, second])), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,45 @@
 #!/usr/bin/env python3
 import sqlite3
 import datetime
+import bisect
+import time
+import queue
+import threading
+from collections import defaultdict
 import curses
 import curses.textpad
 
-def init_db():
-    conn = sqlite3.connect('tasks.db')
-    c = conn.cursor()
-    
+DB_PATH = 'tasks.db'
+WRITE_BATCH_SIZE = 100  # Сколько изменений из очереди фиксируется одной транзакцией
+SEARCH_LIMIT = 200
+
+# Записи поискового индекса: rowid = номер строки источника * 3 + вид
+SEARCH_TASK, SEARCH_OBJECT, SEARCH_LOG = range(3)
+SEARCH_LABELS = {SEARCH_TASK: "Task", SEARCH_OBJECT: "Object", SEARCH_LOG: "Log"}
+
+# Запросы списков; индексы из миграций подобраны под их WHERE и ORDER BY.
+# Задачи читаются страницами по ключу (created_date, id) и без описаний
+TASK_PAGE_FIRST = """SELECT id, name, created_date FROM tasks
+                  ORDER BY created_date DESC, id DESC LIMIT ?"""
+TASK_PAGE_FROM = """SELECT id, name, created_date FROM tasks
+                  WHERE (created_date, id) <= (?, ?)
+                  ORDER BY created_date DESC, id DESC LIMIT ?"""
+TASK_PAGE_AFTER = """SELECT id, name, created_date FROM tasks
+                  WHERE (created_date, id) < (?, ?)
+                  ORDER BY created_date DESC, id DESC LIMIT ?"""
+TASK_PAGE_BEFORE = """SELECT id, name, created_date FROM tasks
+                  WHERE (created_date, id) > (?, ?)
+                  ORDER BY created_date ASC, id ASC LIMIT ?"""
+OBJECTS_QUERY = """SELECT id, object_type, name, created_date, description 
+                  FROM task_objects 
+                  WHERE task_id = ? 
+                  ORDER BY object_type ASC, created_date DESC"""
+LOGS_QUERY = """SELECT id, log_date, content, created_date 
+                  FROM task_logs 
+                  WHERE task_id = ? 
+                  ORDER BY log_date DESC"""
+
+def _migration_base_schema(c):
     # Таблица задач
     c.execute('''CREATE TABLE IF NOT EXISTS tasks (
                 id TEXT PRIMARY KEY,
@@ -34,33 +66,470 @@ def init_db():
                 created_date TEXT NOT NULL,
                 FOREIGN KEY (task_id) REFERENCES tasks(id))''')
     
-    # Проверяем существование колонок для tasks
+    # Базы, созданные до появления версий, могут не иметь поздних колонок
     c.execute("PRAGMA table_info(tasks)")
     columns = [col[1] for col in c.fetchall()]
     if 'description' not in columns:
         c.execute("ALTER TABLE tasks ADD COLUMN description TEXT")
     
-    # Проверяем существование колонки name для task_objects
     c.execute("PRAGMA table_info(task_objects)")
     columns = [col[1] for col in c.fetchall()]
     if 'name' not in columns:
         c.execute("ALTER TABLE task_objects ADD COLUMN name TEXT NOT NULL DEFAULT 'Unnamed'")
-    
-    conn.commit()
+
+def _migration_sortable_dates(c):
+    # Даты в виде "YYYY-MM-DD HH:MM:SS" сортируются как строки, и ORDER BY может идти по индексу
+    for table in ("tasks", "task_objects", "task_logs"):
+        c.execute(f"""UPDATE {table} SET created_date = datetime(created_date)
+                  WHERE datetime(created_date) IS NOT NULL
+                  AND created_date != datetime(created_date)""")
+
+def _migration_list_indexes(c):
+    # Список задач: сортировка по дате без временного B-дерева
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks(created_date DESC)")
+    # Объекты задачи: WHERE task_id и ORDER BY object_type, created_date берутся из индекса.
+    # Индекс намеренно не покрывающий: список читает и полное описание, а его копия в индексе
+    # удвоила бы размер базы и цену каждой правки ради долей миллисекунды на открытии списка
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_task_objects_task
+              ON task_objects(task_id, object_type ASC, created_date DESC)""")
+
+def _migration_unique_daily_log(c):
+    # Несколько логов за один день склеиваются в самый ранний, затем день становится уникальным
+    c.execute("""SELECT task_id, log_date FROM task_logs
+              GROUP BY task_id, log_date HAVING COUNT(*) > 1""")
+    for task_id, log_date in c.fetchall():
+        c.execute("""SELECT id, content, created_date FROM task_logs
+                  WHERE task_id = ? AND log_date = ? ORDER BY id""", (task_id, log_date))
+        rows = c.fetchall()
+        content = "\n\n".join(row[1] for row in rows if row[1].strip())
+        created_date = max(row[2] for row in rows)
+        c.execute("UPDATE task_logs SET content = ?, created_date = ? WHERE id = ?",
+                  (content, created_date, rows[0][0]))
+        c.executemany("DELETE FROM task_logs WHERE id = ?", [(row[0],) for row in rows[1:]])
+    # Уникальный индекс заодно обслуживает список логов задачи по дате; текст лога, как и описание
+    # объекта, берется из таблицы, чтобы не хранить его дважды
+    c.execute("""CREATE UNIQUE INDEX IF NOT EXISTS idx_task_logs_day
+              ON task_logs(task_id, log_date DESC)""")
+
+def _migration_task_page_index(c):
+    # Покрывающий индекс страниц задач: порядок с учетом id и имя без обращения к таблице
+    c.execute("DROP INDEX IF EXISTS idx_tasks_created")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_page ON tasks(created_date DESC, id DESC, name)")
+
+def _migration_search_index(c):
+    # Общий FTS5-индекс по задачам, объектам и логам, чтобы bm25 ранжировал их вместе
+    c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+              task_id UNINDEXED, title, body,
+              tokenize='unicode61 remove_diacritics 2', prefix='2 3')""")
+    # У tasks текстовый ключ, а неявный rowid может смениться после VACUUM: постоянный номер храним отдельно
+    c.execute("""CREATE TABLE IF NOT EXISTS task_search_rows (
+              row INTEGER PRIMARY KEY,
+              task_id TEXT NOT NULL UNIQUE)""")
+    task_row = "(SELECT row FROM task_search_rows WHERE task_id = {}.id) * 3"
+    triggers = f"""
+        CREATE TRIGGER IF NOT EXISTS tasks_search_ai AFTER INSERT ON tasks BEGIN
+            INSERT OR IGNORE INTO task_search_rows (task_id) VALUES (new.id);
+            INSERT INTO search_index (rowid, task_id, title, body)
+            VALUES ({task_row.format('new')}, new.id, new.name, coalesce(new.description, ''));
+        END;
+        CREATE TRIGGER IF NOT EXISTS tasks_search_au AFTER UPDATE ON tasks BEGIN
+            DELETE FROM search_index WHERE rowid = {task_row.format('old')};
+            UPDATE task_search_rows SET task_id = new.id WHERE task_id = old.id;
+            INSERT INTO search_index (rowid, task_id, title, body)
+            VALUES ({task_row.format('new')}, new.id, new.name, coalesce(new.description, ''));
+        END;
+        CREATE TRIGGER IF NOT EXISTS tasks_search_ad AFTER DELETE ON tasks BEGIN
+            DELETE FROM search_index WHERE rowid = {task_row.format('old')};
+            DELETE FROM task_search_rows WHERE task_id = old.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS task_objects_search_ai AFTER INSERT ON task_objects BEGIN
+            INSERT INTO search_index (rowid, task_id, title, body)
+            VALUES (new.id * 3 + {SEARCH_OBJECT}, new.task_id, new.name, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS task_objects_search_au AFTER UPDATE ON task_objects BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * 3 + {SEARCH_OBJECT};
+            INSERT INTO search_index (rowid, task_id, title, body)
+            VALUES (new.id * 3 + {SEARCH_OBJECT}, new.task_id, new.name, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS task_objects_search_ad AFTER DELETE ON task_objects BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * 3 + {SEARCH_OBJECT};
+        END;
+        CREATE TRIGGER IF NOT EXISTS task_logs_search_ai AFTER INSERT ON task_logs BEGIN
+            INSERT INTO search_index (rowid, task_id, title, body)
+            VALUES (new.id * 3 + {SEARCH_LOG}, new.task_id, new.log_date, new.content);
+        END;
+        CREATE TRIGGER IF NOT EXISTS task_logs_search_au AFTER UPDATE ON task_logs BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * 3 + {SEARCH_LOG};
+            INSERT INTO search_index (rowid, task_id, title, body)
+            VALUES (new.id * 3 + {SEARCH_LOG}, new.task_id, new.log_date, new.content);
+        END;
+        CREATE TRIGGER IF NOT EXISTS task_logs_search_ad AFTER DELETE ON task_logs BEGIN
+            DELETE FROM search_index WHERE rowid = old.id * 3 + {SEARCH_LOG};
+        END;
+    """
+    # executescript зафиксировал бы транзакцию миграции, поэтому триггеры создаются по одному
+    for trigger in triggers.split("END;")[:-1]:
+        c.execute(trigger + "END;")
+    # Индексируем то, что уже лежит в базе
+    c.execute("INSERT OR IGNORE INTO task_search_rows (task_id) SELECT id FROM tasks ORDER BY created_date")
+    c.execute("""INSERT INTO search_index (rowid, task_id, title, body)
+              SELECT r.row * 3, t.id, t.name, coalesce(t.description, '')
+              FROM tasks t JOIN task_search_rows r ON r.task_id = t.id""")
+    c.execute(f"""INSERT INTO search_index (rowid, task_id, title, body)
+              SELECT id * 3 + {SEARCH_OBJECT}, task_id, name, description FROM task_objects""")
+    c.execute(f"""INSERT INTO search_index (rowid, task_id, title, body)
+              SELECT id * 3 + {SEARCH_LOG}, task_id, log_date, content FROM task_logs""")
+
+# Миграции по порядку; номер версии базы (PRAGMA user_version) - сколько из них применено
+MIGRATIONS = [
+    _migration_base_schema,
+    _migration_sortable_dates,
+    _migration_list_indexes,
+    _migration_unique_daily_log,
+    _migration_task_page_index,
+    _migration_search_index,
+]
+
+def migrate(conn, target=len(MIGRATIONS)):
+    """Применяет недостающие миграции, каждую в своей транзакции"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number in range(version + 1, target + 1):
+        c = conn.cursor()
+        c.execute("BEGIN")
+        try:
+            MIGRATIONS[number - 1](c)
+            c.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def _match_query(query):
+    # Каждое слово ищется как префикс; кавычки не дают пользователю сломать синтаксис FTS
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in query.split())
+
+def search(conn, query, limit=SEARCH_LIMIT):
+    """Список (вид, id объекта или лога, id задачи, имя задачи, заголовок, фрагмент) от самых релевантных"""
+    match = _match_query(query)
+    if not match:
+        return []
+    # Сначала по bm25 отбираются лучшие rowid, фрагменты строятся только для них.
+    # Записи задач, удаленных без своих объектов и логов, в выдачу не попадают
+    return conn.execute("""WITH top AS (
+                            SELECT rowid AS row, bm25(search_index, 0.0, 5.0, 1.0) AS score
+                            FROM search_index WHERE search_index MATCH :match
+                            ORDER BY score LIMIT :limit)
+                        SELECT s.rowid % 3, s.rowid / 3, s.task_id, t.name, s.title,
+                        snippet(search_index, -1, '[', ']', '...', 12)
+                        FROM top
+                        JOIN search_index s ON s.rowid = top.row
+                        JOIN tasks t ON t.id = s.task_id
+                        WHERE search_index MATCH :match
+                        ORDER BY top.score""",
+                        {"match": match, "limit": limit}).fetchall()
+
+def connect(path=DB_PATH):
+    conn = sqlite3.connect(path)
+    # WAL: чтение не ждет записи, а fsync только на контрольных точках.
+    # При падении программы зафиксированные транзакции сохраняются, база не портится
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     return conn
 
+def init_db(path=DB_PATH):
+    conn = connect(path)
+    migrate(conn)
+    return conn
+
+class PendingWrite:
+    """Изменение в очереди записи; ошибку фиксации забирает take_errors()"""
+    def __init__(self, sql, params, action, task_id=None):
+        self.sql = sql
+        self.params = params
+        self.action = action
+        self.task_id = task_id
+        self.error = None
+
+class DatabaseWriter(threading.Thread):
+    """Поток записи со своим соединением: изменения из очереди фиксируются пачками,
+    интерфейс не ждет диска"""
+    def __init__(self, path=DB_PATH):
+        super().__init__(daemon=True)
+        self.path = path
+        self.queue = queue.Queue()
+        self.pending = 0
+        self.pending_by_task = defaultdict(int)  # задача -> ее изменения в очереди
+        self.errors = []
+        self._cond = threading.Condition()
+        self.start()
+
+    def execute(self, sql, params=(), action="save", task_id=None):
+        """Ставит изменение в очередь и сразу возвращается; action называет его в сообщении об ошибке,
+        task_id - задачу, чтение которой должно его дождаться"""
+        write = PendingWrite(sql, params, action, task_id)
+        with self._cond:
+            self.pending += 1
+            self.pending_by_task[task_id] += 1
+        self.queue.put(write)
+        return write
+
+    def wait(self, task_id=None):
+        """Ждет фиксации изменений задачи task_id, а без нее - всех поставленных изменений"""
+        with self._cond:
+            if task_id is None:
+                self._cond.wait_for(lambda: self.pending == 0)
+            else:
+                self._cond.wait_for(lambda: task_id not in self.pending_by_task)
+
+    def take_errors(self):
+        """Неудачные изменения, о которых еще не сообщили"""
+        with self._cond:
+            errors, self.errors = self.errors, []
+        return errors
+
+    def close(self):
+        """Дописывает очередь и закрывает соединение"""
+        self.queue.put(None)
+        self.join()
+
+    def _commit(self, conn, batch):
+        try:
+            conn.execute("BEGIN")
+            for write in batch:
+                conn.execute(write.sql, write.params)
+            conn.commit()
+            return
+        except sqlite3.Error:
+            conn.rollback()
+        # Пачка откатилась целиком: повторяем по одному, чтобы потерять только ошибочное изменение
+        for write in batch:
+            try:
+                conn.execute(write.sql, write.params)
+                conn.commit()
+            except sqlite3.Error as e:
+                conn.rollback()
+                write.error = str(e)
+
+    def run(self):
+        conn = None
+        connect_error = None
+        try:
+            conn = connect(self.path)
+        except sqlite3.Error as e:
+            # Без соединения поток продолжает разбирать очередь, отвечая ошибкой на каждое изменение
+            connect_error = str(e)
+        stop = False
+        while not stop:
+            item = self.queue.get()
+            if item is None:
+                break
+            # Все, что накопилось за время прошлой записи, уходит одной транзакцией
+            batch = [item]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                if conn is None:
+                    for write in batch:
+                        write.error = connect_error
+                else:
+                    self._commit(conn, batch)
+            except Exception as e:
+                for write in batch:
+                    write.error = write.error or str(e)
+            finally:
+                # Счетчик уменьшается при любом исходе, иначе wait() повесит интерфейс
+                with self._cond:
+                    self.errors.extend(write for write in batch if write.error)
+                    self.pending -= len(batch)
+                    for write in batch:
+                        self.pending_by_task[write.task_id] -= 1
+                        if not self.pending_by_task[write.task_id]:
+                            del self.pending_by_task[write.task_id]
+                    self._cond.notify_all()
+        if conn is not None:
+            conn.close()
+
+class _Descending:
+    """Ключ для bisect по списку, отсортированному по убыванию"""
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+class TaskWindow:
+    """Видимая страница списка задач; соседние строки дочитываются по ключу.
+    Изменения задач уходят в очередь записи и сразу применяются к странице без перечитывания"""
+    def __init__(self, conn, writer, size=1):
+        self.conn = conn
+        self.writer = writer
+        self.size = max(1, size)
+        self.rows = []
+        self.selected = 0
+        self.refresh()
+
+    @staticmethod
+    def _key(row):
+        return (row[2], row[0])
+
+    def _fetch(self, query, params, wait=True):
+        # Чтение должно видеть свои же изменения, поэтому сначала дожидаемся очереди записи
+        if wait:
+            self.writer.wait()
+        return self.conn.execute(query, params).fetchall()
+
+    def _position(self, row):
+        return bisect.bisect_left(self.rows, _Descending(self._key(row)),
+                                  key=lambda r: _Descending(self._key(r)))
+
+    def _index(self, task_id):
+        for i, row in enumerate(self.rows):
+            if row[0] == task_id:
+                return i
+        return None
+
+    def selected_task(self):
+        return self.rows[self.selected] if self.rows else None
+
+    def refresh(self, keep_id=None):
+        """Перечитывает страницу с той же верхней строки, выбор остается на keep_id или на той же позиции"""
+        if keep_id is None and self.selected < len(self.rows):
+            keep_id = self.rows[self.selected][0]
+        if self.rows:
+            rows = self._fetch(TASK_PAGE_FROM, self._key(self.rows[0]) + (self.size,))
+        else:
+            rows = self._fetch(TASK_PAGE_FIRST, (self.size,))
+        # В конце списка страница могла опустеть: добираем строки сверху
+        if len(rows) < self.size and rows:
+            before = self._fetch(TASK_PAGE_BEFORE, self._key(rows[0]) + (self.size - len(rows),))
+            rows = before[::-1] + rows
+        elif not rows:
+            rows = self._fetch(TASK_PAGE_FIRST, (self.size,))
+        self.rows = rows
+        ids = [row[0] for row in rows]
+        if keep_id in ids:
+            self.selected = ids.index(keep_id)
+        self.selected = max(0, min(self.selected, len(rows) - 1))
+
+    def create(self, task_id, name, created_date):
+        """Добавляет задачу и выбирает ее"""
+        self.writer.execute("INSERT INTO tasks (id, name, created_date, description) VALUES (?, ?, ?, ?)",
+                            (task_id, name, created_date, ""), f"create task '{task_id}'", task_id)
+        row = (task_id, name, created_date)
+        pos = self._position(row)
+        # Внутри страницы или на неполной странице соседи известны, иначе страница строится от новой строки
+        if 0 < pos < len(self.rows) or len(self.rows) < self.size:
+            self.rows.insert(pos, row)
+            del self.rows[self.size:]
+            self.selected = pos
+        else:
+            self.rows = [row]
+            self.selected = 0
+            self.refresh(task_id)
+
+    def rename(self, task_id, name):
+        self.writer.execute("UPDATE tasks SET name = ? WHERE id = ?", (name, task_id),
+                            f"rename task '{task_id}'", task_id)
+        # Ключ сортировки не меняется, строка остается на месте
+        i = self._index(task_id)
+        if i is not None:
+            self.rows[i] = (task_id, name, self.rows[i][2])
+
+    def delete(self, task_id):
+        """Удаляет задачу; выбор переходит на строку, вставшую на ее место"""
+        self.writer.execute("DELETE FROM tasks WHERE id = ?", (task_id,), f"delete task '{task_id}'",
+                            task_id)
+        i = self._index(task_id)
+        if i is None:
+            return
+        row = self.rows.pop(i)
+        # Освободившееся место занимает следующая за страницей строка, а в конце списка - предыдущая.
+        # Удаление может быть еще в очереди: читаем на строку больше и отбрасываем удаленную
+        after = self._key(self.rows[-1]) if self.rows else self._key(row)
+        rows = [r for r in self._fetch(TASK_PAGE_AFTER, after + (2,), wait=False) if r[0] != task_id]
+        if rows:
+            self.rows.append(rows[0])
+        else:
+            before = self._key(self.rows[0]) if self.rows else self._key(row)
+            rows = [r for r in self._fetch(TASK_PAGE_BEFORE, before + (2,), wait=False) if r[0] != task_id]
+            if rows:
+                self.rows.insert(0, rows[0])
+                i += 1
+        self.selected = max(0, min(i, len(self.rows) - 1))
+
+    def resize(self, size):
+        size = max(1, size)
+        if size == self.size:
+            return
+        self.size = size
+        keep_id = self.selected_task()[0] if self.rows else None
+        # Выбранная строка должна остаться в окне после уменьшения
+        if self.rows and self.selected >= size:
+            self.rows = self.rows[self.selected - size + 1:]
+        self.refresh(keep_id)
+
+    def move_down(self):
+        if self.selected < len(self.rows) - 1:
+            self.selected += 1
+            return
+        if not self.rows:
+            return
+        rows = self._fetch(TASK_PAGE_AFTER, self._key(self.rows[-1]) + (1,))
+        if rows:
+            self.rows = (self.rows + rows)[-self.size:]
+            self.selected = len(self.rows) - 1
+
+    def move_up(self):
+        if self.selected > 0:
+            self.selected -= 1
+            return
+        if not self.rows:
+            return
+        rows = self._fetch(TASK_PAGE_BEFORE, self._key(self.rows[0]) + (1,))
+        if rows:
+            self.rows = (rows + self.rows)[:self.size]
+            self.selected = 0
+
+    def page_down(self):
+        if not self.rows:
+            return
+        rows = self._fetch(TASK_PAGE_AFTER, self._key(self.rows[-1]) + (self.size,))
+        if rows:
+            self.rows = (self.rows + rows)[-self.size:]
+        else:
+            self.selected = len(self.rows) - 1
+
+    def page_up(self):
+        if not self.rows:
+            return
+        rows = self._fetch(TASK_PAGE_BEFORE, self._key(self.rows[0]) + (self.size,))
+        if rows:
+            self.rows = (rows[::-1] + self.rows)[:self.size]
+        else:
+            self.selected = 0
+
 class TaskManager:
     def __init__(self, stdscr):
         self.stdscr = stdscr
         self.conn = init_db()
-        self.tasks = []
-        self.selected_idx = 0
-        self.load_tasks()
+        self.writer = DatabaseWriter()
+        # Заголовок, разделитель и подсказки занимают три строки
+        self.tasks = TaskWindow(self.conn, self.writer, curses.LINES - 3)
         
-    def load_tasks(self):
-        c = self.conn.cursor()
-        c.execute("SELECT id, name, created_date, description FROM tasks ORDER BY datetime(created_date) DESC")
-        self.tasks = c.fetchall()
+    def cursor(self, task_id=None):
+        """Курсор для чтения: сначала дожидается записи изменений задачи task_id из очереди,
+        а без нее - всех изменений. Изменения других задач экран задачи не ждет"""
+        self.writer.wait(task_id)
+        return self.conn.cursor()
         
     def get_input(self, y, x, max_len):
         """Универсальная функция ввода с поддержкой русского"""
@@ -121,7 +590,9 @@ class TaskManager:
             return
             
         # Проверка уникальности ID
-        if any(task[0] == task_id for task in self.tasks):
+        c = self.cursor(task_id)
+        c.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,))
+        if c.fetchone():
             self.show_message(f"ID '{task_id}' already exists! Press any key.")
             self.stdscr.getch()
             return
@@ -132,53 +603,34 @@ class TaskManager:
         
         if name:
             created_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            c = self.conn.cursor()
-            try:
-                c.execute("INSERT INTO tasks (id, name, created_date, description) VALUES (?, ?, ?, ?)", 
-                         (task_id, name, created_date, ""))
-                self.conn.commit()
-                self.load_tasks()
-                self.selected_idx = 0
-            except sqlite3.Error as e:
-                self.show_message(f"Error: {str(e)}. Press any key.")
-                self.stdscr.getch()
+            self.tasks.create(task_id, name, created_date)
 
     def update_task(self):
-        if not self.tasks:
+        task = self.tasks.selected_task()
+        if not task:
             return
             
-        task_id = self.tasks[self.selected_idx][0]
-        self.show_message(f"Update task (current: {self.tasks[self.selected_idx][1]}): ")
+        task_id = task[0]
+        self.show_message(f"Update task (current: {task[1]}): ")
         new_name = self.get_input(
             curses.LINES - 1,
-            len(f"Update task (current: {self.tasks[self.selected_idx][1]}): "),
+            len(f"Update task (current: {task[1]}): "),
             70
         )
         
         if new_name:
-            c = self.conn.cursor()
-            c.execute("UPDATE tasks SET name = ? WHERE id = ?", (new_name, task_id))
-            self.conn.commit()
-            self.load_tasks()
+            self.tasks.rename(task_id, new_name)
 
     def delete_task(self):
-        if not self.tasks:
+        task = self.tasks.selected_task()
+        if not task:
             return
             
-        task_id = self.tasks[self.selected_idx][0]
-        c = self.conn.cursor()
-        c.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        self.conn.commit()
-        prev_len = len(self.tasks)
-        self.load_tasks()
-        
-        if prev_len > 0:
-            if self.selected_idx >= len(self.tasks):
-                self.selected_idx = max(0, len(self.tasks) - 1)
+        self.tasks.delete(task[0])
 
     def edit_description(self, task_id):
         # Получаем текущее описание
-        c = self.conn.cursor()
+        c = self.cursor(task_id)
         c.execute("SELECT description FROM tasks WHERE id = ?", (task_id,))
         result = c.fetchone()
         description = result[0] if result else ""
@@ -205,8 +657,8 @@ class TaskManager:
         edited_text = textbox.gather().strip()
         
         # Сохраняем изменения
-        c.execute("UPDATE tasks SET description = ? WHERE id = ?", (edited_text, task_id))
-        self.conn.commit()
+        self.writer.execute("UPDATE tasks SET description = ? WHERE id = ?", (edited_text, task_id),
+                            f"edit description of '{task_id}'", task_id)
         
         return edited_text
 
@@ -312,34 +764,21 @@ class TaskManager:
         
         # Сохраняем объект
         if description:
-            c = self.conn.cursor()
-            try:
-                c.execute("""INSERT INTO task_objects 
-                          (task_id, object_type, name, description, created_date) 
-                          VALUES (?, ?, ?, ?, ?)""", 
-                          (task_id, obj_type, obj_name, description, created_date))
-                self.conn.commit()
-                self.show_message(f"Added {obj_type} '{obj_name}' to task! Press any key.")
-                self.stdscr.getch()
-            except sqlite3.Error as e:
-                self.show_message(f"Error: {str(e)}. Press any key.")
-                self.stdscr.getch()
+            # Запись уходит в очередь; если она не удастся, сообщит report_write_errors
+            self.writer.execute("""INSERT INTO task_objects 
+                      (task_id, object_type, name, description, created_date) 
+                      VALUES (?, ?, ?, ?, ?)""", 
+                      (task_id, obj_type, obj_name, description, created_date),
+                      f"add {obj_type} '{obj_name}'", task_id)
+            self.show_message(f"Added {obj_type} '{obj_name}' to task! Press any key.")
+            self.stdscr.getch()
         else:
             self.show_message("Description cannot be empty! Object not created. Press any key.")
             self.stdscr.getch()
 
-    def update_object(self, task_id, obj_id):
-        c = self.conn.cursor()
-        # Получаем текущие данные объекта
-        c.execute("""SELECT object_type, name, description 
-                  FROM task_objects 
-                  WHERE id = ?""", (obj_id,))
-        obj = c.fetchone()
-        
-        if not obj:
-            return
-            
-        obj_type, name, description = obj
+    def update_object(self, task_id, obj):
+        # Текущие данные объекта берутся из строки списка, перечитывать базу не нужно
+        obj_id, obj_type, name, created_date, description = obj
         
         # Шаг 1: Редактирование имени объекта
         self.stdscr.clear()
@@ -379,27 +818,24 @@ class TaskManager:
         
         # Сохраняем изменения
         if new_description:
-            c.execute("""UPDATE task_objects 
+            self.writer.execute("""UPDATE task_objects 
                       SET name = ?, description = ? 
                       WHERE id = ?""",
-                      (new_name, new_description, obj_id))
-            self.conn.commit()
+                      (new_name, new_description, obj_id),
+                      f"update object '{new_name}'", task_id)
             self.show_message(f"Object updated! Press any key.")
             self.stdscr.getch()
+            # Строка в формате OBJECTS_QUERY, чтобы список обновил ее на месте
+            return (obj_id, obj_type, new_name, created_date, new_description)
         else:
             self.show_message("Description cannot be empty! Update canceled. Press any key.")
             self.stdscr.getch()
-            
-        return new_description
+            return None
 
     def show_list_objects(self, task_id):
         # Получаем объекты для задачи
-        c = self.conn.cursor()
-        c.execute("""SELECT id, object_type, name, created_date, description 
-                  FROM task_objects 
-                  WHERE task_id = ? 
-                  ORDER BY object_type ASC, created_date DESC""", 
-                  (task_id,))
+        c = self.cursor(task_id)
+        c.execute(OBJECTS_QUERY, (task_id,))
         objects = c.fetchall()
         
         if not objects:
@@ -413,6 +849,16 @@ class TaskManager:
         page_size = curses.LINES - 3
         
         while True:
+            # Правка объекта не сохранилась: сообщаем и показываем то, что в базе
+            if self.report_write_errors():
+                c = self.cursor(task_id)
+                c.execute(OBJECTS_QUERY, (task_id,))
+                objects = c.fetchall()
+                if not objects:
+                    return
+                current_idx = min(current_idx, len(objects) - 1)
+                start_idx = min(start_idx, current_idx)
+            
             self.stdscr.clear()
             height, width = self.stdscr.getmaxyx()
             
@@ -471,15 +917,10 @@ class TaskManager:
                 self.show_object_details(task_id, obj)
             elif key == 21:  # Ctrl+U - Обновить объект
                 if objects:
-                    obj_id = objects[current_idx][0]
-                    self.update_object(task_id, obj_id)
-                    # Перезагружаем объекты
-                    c.execute("""SELECT id, object_type, name, created_date, description 
-                              FROM task_objects 
-                              WHERE task_id = ? 
-                              ORDER BY object_type ASC, created_date DESC""", 
-                              (task_id,))
-                    objects = c.fetchall()
+                    updated = self.update_object(task_id, objects[current_idx])
+                    # Тип и дата не меняются, поэтому порядок тот же: заменяем строку на месте
+                    if updated:
+                        objects[current_idx] = updated
 
     def show_object_details(self, task_id, obj):
         obj_id, obj_type, obj_name, created_date, description = obj
@@ -536,30 +977,16 @@ class TaskManager:
     def edit_today_log(self, task_id):
         """Создает или редактирует лог за сегодняшний день"""
         today = datetime.date.today().strftime("%Y-%m-%d")
-        created_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        c = self.conn.cursor()
+        c = self.cursor(task_id)
         
-        # Проверяем, есть ли уже лог за сегодня
-        c.execute("""SELECT id, content 
+        # Текущий лог за сегодня, если он уже есть
+        c.execute("""SELECT content 
                   FROM task_logs 
                   WHERE task_id = ? AND log_date = ?""", 
                   (task_id, today))
         log = c.fetchone()
-        
-        log_id = None
-        content = ""
-        
-        if log:
-            log_id, content = log
-        else:
-            # Создаем новую запись лога
-            c.execute("""INSERT INTO task_logs 
-                      (task_id, log_date, content, created_date) 
-                      VALUES (?, ?, ?, ?)""", 
-                      (task_id, today, "", created_date))
-            self.conn.commit()
-            log_id = c.lastrowid
+        content = log[0] if log else ""
         
         # Создаем окно для редактирования
         edit_win = curses.newwin(curses.LINES - 1, curses.COLS, 0, 0)
@@ -582,23 +1009,21 @@ class TaskManager:
         # Получаем отредактированный текст
         edited_text = textbox.gather().strip()
         
-        # Сохраняем изменения
-        c.execute("""UPDATE task_logs 
-                  SET content = ?, created_date = ?
-                  WHERE id = ?""", 
-                  (edited_text, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), log_id))
-        self.conn.commit()
+        # Сохраняем одной командой: новый лог создается, существующий обновляется
+        self.writer.execute("""INSERT INTO task_logs 
+                  (task_id, log_date, content, created_date) 
+                  VALUES (?, ?, ?, ?)
+                  ON CONFLICT (task_id, log_date) DO UPDATE
+                  SET content = excluded.content, created_date = excluded.created_date""", 
+                  (task_id, today, edited_text, datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+                  f"save today's log of '{task_id}'", task_id)
         
         return edited_text
 
     def show_log_list(self, task_id):
         """Показывает список логов для задачи"""
-        c = self.conn.cursor()
-        c.execute("""SELECT id, log_date, content, created_date 
-                  FROM task_logs 
-                  WHERE task_id = ? 
-                  ORDER BY log_date DESC""", 
-                  (task_id,))
+        c = self.cursor(task_id)
+        c.execute(LOGS_QUERY, (task_id,))
         logs = c.fetchall()
         
         if not logs:
@@ -726,11 +1151,11 @@ class TaskManager:
             if key == ord('q'):
                 break
 
-    def view_task_details(self, task_idx):
+    def view_task_details(self, task_id):
         # Загружаем текущие данные задачи
-        c = self.conn.cursor()
+        c = self.cursor(task_id)
         c.execute("SELECT id, name, created_date, description FROM tasks WHERE id = ?", 
-                  (self.tasks[task_idx][0],))
+                  (task_id,))
         task = c.fetchone()
         
         if not task:
@@ -749,6 +1174,15 @@ class TaskManager:
         
         # Режим детального просмотра
         while True:
+            # Описание или лог не сохранились: сообщаем здесь и перечитываем задачу
+            if self.report_write_errors():
+                c = self.cursor(task_id)
+                c.execute("SELECT name, description FROM tasks WHERE id = ?", (task_id,))
+                task = c.fetchone()
+                if not task:
+                    return
+                name, description = task
+            
             # Форматируем дату
             try:
                 dt = datetime.datetime.strptime(created_date, "%Y-%m-%d %H:%M:%S")
@@ -824,10 +1258,101 @@ class TaskManager:
                     self.show_log_list(task_id)
             elif key == 15:  # Ctrl+O
                 # Редактируем описание
-                new_description = self.edit_description(task_id)
-                description = new_description
-                # Обновляем список задач
-                self.load_tasks()
+                # Описание в списке задач не показывается, список не трогаем
+                description = self.edit_description(task_id)
+
+    def open_search_result(self, result):
+        """Открывает найденную задачу, объект или лог"""
+        kind, ref, task_id = result[:3]
+        c = self.cursor(task_id)
+        if kind == SEARCH_OBJECT:
+            c.execute("""SELECT id, object_type, name, created_date, description 
+                      FROM task_objects WHERE id = ?""", (ref,))
+            obj = c.fetchone()
+            if obj:
+                self.show_object_details(task_id, obj)
+        elif kind == SEARCH_LOG:
+            c.execute("""SELECT id, log_date, content, created_date 
+                      FROM task_logs WHERE id = ?""", (ref,))
+            log = c.fetchone()
+            if log:
+                self.show_log_details(task_id, log)
+        else:
+            self.view_task_details(task_id)
+
+    def show_search(self):
+        self.show_message("Search: ")
+        query = self.get_input(curses.LINES - 1, len("Search: "), 70)
+        if not query:
+            return
+        
+        started = time.perf_counter()
+        results = search(self.cursor(), query)
+        elapsed = (time.perf_counter() - started) * 1000
+        if not results:
+            self.show_message(f"Nothing found for '{query}'. Press any key.")
+            self.stdscr.getch()
+            return
+        
+        current_idx = 0
+        start_idx = 0
+        while True:
+            self.stdscr.clear()
+            height, width = self.stdscr.getmaxyx()
+            page_size = max(1, height - 3)
+            
+            self.stdscr.addstr(0, 0, f"Search: {query} - {len(results)} found in {elapsed:.1f} ms"[:width-1])
+            self.stdscr.addstr(1, 0, "-" * (width - 1))
+            
+            for i, result in enumerate(results[start_idx:start_idx+page_size]):
+                kind, _, task_id, task_name, title, fragment = result
+                if kind == SEARCH_TASK:
+                    line = f"{SEARCH_LABELS[kind]:<7}{task_id}: {fragment}"
+                else:
+                    line = f"{SEARCH_LABELS[kind]:<7}{task_id} / {title}: {fragment}"
+                line = " ".join(line.split())
+                
+                if i + start_idx == current_idx:
+                    self.stdscr.attron(curses.A_REVERSE)
+                self.stdscr.addstr(2 + i, 0, line[:width-1])
+                if i + start_idx == current_idx:
+                    self.stdscr.attroff(curses.A_REVERSE)
+            
+            # Подсказки
+            footer = "q:Back  ↑/↓:Navigate  Enter:Open"
+            self.stdscr.addstr(height - 1, 0, footer[:width-1])
+            self.stdscr.refresh()
+            
+            key = self.stdscr.getch()
+            
+            if key == ord('q'):
+                break
+            elif key == curses.KEY_UP:
+                if current_idx > 0:
+                    current_idx -= 1
+                    if current_idx < start_idx:
+                        start_idx = current_idx
+            elif key == curses.KEY_DOWN:
+                if current_idx < len(results) - 1:
+                    current_idx += 1
+                    if current_idx >= start_idx + page_size:
+                        start_idx = current_idx - page_size + 1
+            elif key == 10:  # Enter
+                self.open_search_result(results[current_idx])
+                # Найденное могли изменить: повторяем запрос, позиция сохраняется
+                results = search(self.cursor(), query) or results
+                current_idx = min(current_idx, len(results) - 1)
+                start_idx = min(start_idx, current_idx)
+
+    def report_write_errors(self):
+        """Сообщает о неудачных фоновых записях и показывает то, что на самом деле в базе"""
+        errors = self.writer.take_errors()
+        for write in errors:
+            self.show_message(f"Failed to {write.action}: {write.error}. Press any key.")
+            self.stdscr.getch()
+        if errors:
+            self.tasks.refresh()
+        return bool(errors)
 
     def show_message(self, msg):
         self.stdscr.move(curses.LINES - 1, 0)
@@ -845,9 +1370,10 @@ class TaskManager:
         self.stdscr.addstr(0, 60, "Created Date")
         self.stdscr.addstr(1, 0, "-" * (width - 1))
         
-        # Задачи
-        for i, task in enumerate(self.tasks):
-            task_id, name, created_date, _ = task
+        # Задачи: только строки, помещающиеся между заголовком и подсказками
+        self.tasks.resize(height - 3)
+        for i, task in enumerate(self.tasks.rows[:max(0, height - 3)]):
+            task_id, name, created_date = task
             line = i + 2
             
             # Форматируем дату
@@ -862,18 +1388,22 @@ class TaskManager:
             display_name = name if len(name) < 38 else name[:35] + "..."
             
             # Выделение текущей строки
-            if i == self.selected_idx:
+            if i == self.tasks.selected:
                 self.stdscr.attron(curses.A_REVERSE)
             
-            self.stdscr.addstr(line, 0, display_id)
-            self.stdscr.addstr(line, 20, display_name)
-            self.stdscr.addstr(line, 60, display_date)
+            for col, text in ((0, display_id), (20, display_name), (60, display_date)):
+                if col < width - 1:
+                    self.stdscr.addstr(line, col, text[:width - 1 - col])
             
-            if i == self.selected_idx:
+            if i == self.tasks.selected:
                 self.stdscr.attroff(curses.A_REVERSE)
         
+        # Изменения, которые еще не записаны на диск
+        if self.writer.pending:
+            self.stdscr.addstr(0, max(0, width - 8), "unsaved"[:width - 1], curses.A_BOLD)
+        
         # Подсказки
-        footer = "Ctrl+N:New  Ctrl+U:Update  Ctrl+D:Delete  Enter:Details  Ctrl+Q:Quit"
+        footer = "Ctrl+N:New  Ctrl+U:Update  Ctrl+D:Delete  Enter:Details  /:Search  Ctrl+Q:Quit"
         self.stdscr.addstr(height - 1, 0, footer[:width-1])
         self.stdscr.refresh()
 
@@ -882,21 +1412,31 @@ class TaskManager:
         self.stdscr.keypad(True)
         
         while True:
+            self.report_write_errors()
             self.draw_ui()
+            # Пока есть незаписанные изменения, экран перерисовывается, чтобы снять пометку
+            self.stdscr.timeout(100 if self.writer.pending else -1)
             key = self.stdscr.getch()
+            self.stdscr.timeout(-1)
             
-            if key == curses.KEY_UP and self.selected_idx > 0:
-                self.selected_idx -= 1
-            elif key == curses.KEY_DOWN and self.selected_idx < len(self.tasks) - 1:
-                self.selected_idx += 1
+            if key == curses.KEY_UP:
+                self.tasks.move_up()
+            elif key == curses.KEY_DOWN:
+                self.tasks.move_down()
+            elif key == curses.KEY_PPAGE:
+                self.tasks.page_up()
+            elif key == curses.KEY_NPAGE:
+                self.tasks.page_down()
             elif key == 14:  # Ctrl+N
                 self.create_task()
             elif key == 21:  # Ctrl+U
                 self.update_task()
             elif key == 4:   # Ctrl+D
                 self.delete_task()
-            elif key == 10:  # Enter
-                self.view_task_details(self.selected_idx)
+            elif key == 10 and self.tasks.selected_task():  # Enter
+                self.view_task_details(self.tasks.selected_task()[0])
+            elif key == ord('/'):
+                self.show_search()
             elif key == 17:  # Ctrl+Q
                 break
 
@@ -906,7 +1446,11 @@ def main(stdscr):
     
     # Инициализируем менеджер задач
     app = TaskManager(stdscr)
-    app.run()
+    try:
+        app.run()
+    finally:
+        # Очередь записи дописывается и при выходе по ошибке
+        app.writer.close()
 
 if __name__ == "__main__":
     curses.wrapper(main)